@@ -0,0 +1,55 @@
+"""Per-query latency of DatabaseManager.execute_query: connect-per-query vs the pooled connection
+
+Usage: python benchmarks/bench_connection.py [--items 100000] [--repeat 200] [--db bench_inventory.db]
+"""
+import argparse
+import sqlite3
+
+from common import build_inventory_db, time_per_call
+from inventory_db import DatabaseManager
+
+QUERIES = [
+    ("count items", "SELECT COUNT(*) FROM items", (), True),
+    ("count low stock", "SELECT COUNT(*) FROM items WHERE quantity <= min_stock", (), True),
+    ("list categories", "SELECT id, name FROM categories ORDER BY name ASC", (), True),
+    ("item by id", "SELECT name, quantity FROM items WHERE id=?", (4242,), True),
+    ("lowest 10", "SELECT name, quantity FROM items ORDER BY quantity ASC LIMIT 10", (), True),
+    ("update item", "UPDATE items SET quantity=quantity WHERE id=?", (4242,), False),
+]
+
+
+def legacy_execute_query(db_name, query, params=(), fetch=False):
+    """The original connect / query / commit / close round trip"""
+    conn = sqlite3.connect(db_name)
+    try:
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        result = cursor.fetchall() if fetch else None
+        conn.commit()
+        return result
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--db", default="bench_inventory.db")
+    args = parser.parse_args()
+
+    build_inventory_db(args.db, args.items)
+    db = DatabaseManager(args.db)
+
+    print(f"{'query':<18}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+    for label, query, params, fetch in QUERIES:
+        before = time_per_call(lambda: legacy_execute_query(args.db, query, params, fetch), args.repeat)
+        after = time_per_call(lambda: db.execute_query(query, params, fetch), args.repeat)
+        print(f"{label:<18}{before:>14.3f}{after:>14.3f}{before / after:>9.1f}x")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Peak Python memory and wall time of the inventory exports: fetchall + DataFrame vs streaming
+
+Usage: python benchmarks/bench_export.py [--items 100000 200000] [--db-prefix bench_export]
+
+Peak memory is measured with tracemalloc, so it covers Python-level allocations
+(sqlite3.Row objects, lists, openpyxl cells); Arrow buffers are allocated outside it.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from common import build_inventory_db
+from inventory_db import DatabaseManager
+import inventory_export
+
+
+def legacy_export_xlsx(db_manager, filename):
+    """The original export: fetchall, copy into lists, build a DataFrame, then write"""
+    import pandas as pd
+
+    items = db_manager.execute_query(inventory_export.EXPORT_QUERY, fetch=True)
+    data_for_df = [list(row) for row in items]
+    pd.DataFrame(data_for_df, columns=inventory_export.EXPORT_COLUMNS).to_excel(filename, index=False)
+    return len(data_for_df)
+
+
+def measure(func, db_manager, filename):
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = func(db_manager, filename)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, elapsed, peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, nargs="+", default=[100_000, 200_000])
+    parser.add_argument("--db-prefix", default="bench_export")
+    args = parser.parse_args()
+
+    exporters = [("xlsx (fetchall + pandas)", legacy_export_xlsx, ".xlsx")]
+    exporters += [(f"{name} (streaming)", writer, ext) for name, (writer, ext) in inventory_export.EXPORT_FORMATS.items()
+                  if name != "pdf"]
+
+    print(f"{'rows':>8}  {'export':<26}{'seconds':>10}{'peak MB':>10}")
+    with tempfile.TemporaryDirectory() as out_dir:
+        for n_items in args.items:
+            db_path = build_inventory_db(f"{args.db_prefix}_{n_items}.db", n_items)
+            db = DatabaseManager(db_path)
+            for label, func, ext in exporters:
+                try:
+                    rows, elapsed, peak = measure(func, db, os.path.join(out_dir, f"export{ext}"))
+                except ImportError as e:
+                    print(f"{n_items:>8}  {label:<26}  skipped: {e}")
+                    continue
+                print(f"{rows:>8}  {label:<26}{elapsed:>10.2f}{peak:>10.1f}")
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Rows per second of the bulk item import vs inserting one row at a time with a commit each
+
+Usage: python benchmarks/bench_import.py [--rows 200000] [--baseline-rows 5000]
+
+The input is a CSV file in the export format with a few invalid rows mixed in.
+The row-by-row baseline is what adding each item through the GUI amounts to.
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+
+import common  # noqa: F401  (puts the repository root on sys.path)
+from inventory_db import DatabaseManager
+import inventory_export
+import inventory_import
+
+
+def write_catalog(filename, n_rows, n_categories=50, seed=7):
+    """Write a supplier catalog CSV with n_rows items, every 1000th of them invalid"""
+    rng = random.Random(seed)
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(inventory_export.EXPORT_COLUMNS)
+        for i in range(1, n_rows + 1):
+            quantity = "lots" if i % 1000 == 0 else rng.randint(0, 500)
+            writer.writerow([f"Item {i:07d}", f"Category {rng.randint(1, n_categories)}", quantity,
+                             f"${rng.uniform(0.5, 500.0):.2f}", rng.randint(0, 50),
+                             f"Supplier {rng.randint(1, 200)}", "2024-01-01 00:00:00"])
+
+
+def row_by_row_import(db_manager, filename):
+    """One execute and commit per row, looking the category up each time"""
+    imported = 0
+    now = "2024-01-01 00:00:00"
+    for _, values in inventory_import.iter_rows(filename):
+        try:
+            name, *fields = inventory_import.parse_row(values, now)
+        except ValueError:
+            continue
+        category = db_manager.execute_query("SELECT id FROM categories WHERE name = ?",
+                                            (values["category"],), fetch=True)
+        if category:
+            category_id = category[0][0]
+        else:
+            category_id = db_manager.execute("INSERT INTO categories (name) VALUES (?)",
+                                             (values["category"],)).lastrowid
+        db_manager.execute_query(inventory_import.INSERT_ITEM, (name, category_id, *fields))
+        imported += 1
+    return imported
+
+
+def bulk_import(db_manager, filename):
+    return inventory_import.import_items(db_manager, filename).imported
+
+
+def run(label, func, rows, work_dir):
+    catalog = os.path.join(work_dir, f"catalog_{rows}.csv")
+    if not os.path.exists(catalog):
+        write_catalog(catalog, rows)
+    db_path = os.path.join(work_dir, f"{label.split()[0]}_{rows}.db")
+    db = DatabaseManager(db_path)
+    start = time.perf_counter()
+    imported = func(db, catalog)
+    elapsed = time.perf_counter() - start
+    db.close()
+    print(f"{label:<14}{rows:>10}{imported:>10}{elapsed:>10.2f}{rows / elapsed:>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--baseline-rows", type=int, default=5_000,
+                        help="rows for the much slower row-by-row baseline")
+    args = parser.parse_args()
+
+    print(f"{'method':<14}{'rows':>10}{'imported':>10}{'seconds':>10}{'rows/s':>12}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        run("row-by-row", row_by_row_import, args.baseline_rows, work_dir)
+        run("bulk", bulk_import, args.baseline_rows, work_dir)
+        run("bulk", bulk_import, args.rows, work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Memory held per loaded item row: QTableWidgetItem cells vs the ItemRecord cache of the items model
+
+Usage: python benchmarks/bench_memory.py [--items 100000] [--rows 10000] [--db bench_inventory.db]
+
+Each case runs in a fresh interpreter and measures its resident set size
+before fetching --rows items and after building the structure from them and
+dropping the fetched rows, so each case is charged for the text it keeps.
+"widgets" is what the items tab used to do: a QTableWidget with one
+QTableWidgetItem per cell, read back into the item form by parsing the cell
+text. "records" is the ItemRecord per row plus the id -> row index kept by
+ItemsTableModel, read back as typed attributes. Form load is the mean time to
+get the typed values of one row.
+"""
+import argparse
+import gc
+import os
+import subprocess
+import sys
+import time
+
+from common import REPO_ROOT, build_inventory_db
+
+CASES = ["widgets", "records"]
+
+
+def rss_kb():
+    """Current resident set size in KB (peak size where /proc is not available)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def build_widgets(rows):
+    from PyQt5.QtWidgets import QApplication, QTableWidget, QTableWidgetItem
+
+    app = QApplication.instance() or QApplication(["bench"])
+    table = QTableWidget()
+    table.setColumnCount(8)
+    table.setRowCount(len(rows))
+    for row, item in enumerate(rows):
+        cells = (str(item['id']), item['name'], item['category_name'] or "N/A", str(item['quantity']),
+                 f"${item['price']:.2f}", str(item['min_stock']), item['supplier'] or "", item['date_added'] or "")
+        for column, text in enumerate(cells):
+            table.setItem(row, column, QTableWidgetItem(text))
+
+    def form_values(row):
+        return (int(table.item(row, 0).text()), table.item(row, 1).text(), table.item(row, 2).text(),
+                int(table.item(row, 3).text()), float(table.item(row, 4).text().replace('$', '')),
+                int(table.item(row, 5).text()), table.item(row, 6).text())
+    return (app, table), form_values
+
+
+def build_records(rows):
+    from inventory_db import ItemRecord
+
+    records = [ItemRecord.from_row(item) for item in rows]
+    rows_by_id = {record.id: row for row, record in enumerate(records)}
+
+    def form_values(row):
+        record = records[row]
+        return (record.id, record.name, record.category_id, record.quantity, record.price, record.min_stock,
+                record.supplier)
+    return (records, rows_by_id), form_values
+
+
+def run_case(case, db_path, n_rows):
+    """Measure one case in this interpreter; prints "<KB> <form load us>" for the parent"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from inventory_db import DatabaseManager
+
+    db = DatabaseManager(db_path)
+    db.fetch_items(limit=10) # Connection and statement cache
+    if case == "widgets":
+        from PyQt5.QtWidgets import QApplication # Qt's own startup memory is not part of the cells
+        QApplication.instance() or QApplication(["bench"])
+    before = rss_kb()
+    rows = db.fetch_items(limit=n_rows)
+    kept, form_values = (build_widgets if case == "widgets" else build_records)(rows)
+    n_loaded = len(rows)
+    del rows
+    gc.collect()
+    after = rss_kb()
+
+    start = time.perf_counter()
+    for row in range(n_loaded):
+        form_values(row)
+    form_us = (time.perf_counter() - start) * 1e6 / max(n_loaded, 1)
+    print(after - before, form_us)
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--rows", type=int, default=10_000, help="rows loaded in each case")
+    parser.add_argument("--db", default="bench_inventory.db")
+    parser.add_argument("--case", choices=CASES, help=argparse.SUPPRESS) # Set for the child interpreters
+    args = parser.parse_args()
+
+    if args.case:
+        run_case(args.case, args.db, args.rows)
+        return
+
+    build_inventory_db(args.db, args.items)
+    n_rows = min(args.rows, args.items)
+    print(f"{n_rows} rows")
+    print(f"{'case':<10}{'memory KB':>12}{'bytes/row':>12}{'form load us':>15}")
+    for case in CASES:
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--case", case, "--db", args.db,
+                               "--rows", str(n_rows)], cwd=REPO_ROOT, capture_output=True, text=True)
+        if proc.returncode:
+            print(f"{case:<10}  skipped: {proc.stderr.strip().splitlines()[-1]}")
+            continue
+        kb, form_us = proc.stdout.split()
+        print(f"{case:<10}{int(kb):>12}{int(kb) * 1024 // n_rows:>12}{float(form_us):>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
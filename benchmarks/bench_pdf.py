@@ -0,0 +1,39 @@
+"""Pages per second of the PDF export: single process vs the page-parallel process pool
+
+Usage: python benchmarks/bench_pdf.py [--items 50000] [--workers 1 2 4]
+"""
+import argparse
+import math
+import os
+import tempfile
+import time
+
+from common import build_inventory_db
+from inventory_db import DatabaseManager
+import inventory_pdf
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, os.cpu_count() or 1])
+    parser.add_argument("--db", default="bench_pdf.db")
+    args = parser.parse_args()
+
+    build_inventory_db(args.db, args.items)
+    db = DatabaseManager(args.db)
+    pages = math.ceil(args.items / inventory_pdf.ROWS_PER_PAGE)
+
+    print(f"{args.items} rows, {pages} pages")
+    print(f"{'workers':>8}{'seconds':>10}{'pages/s':>10}")
+    with tempfile.TemporaryDirectory() as out_dir:
+        for workers in sorted(set(args.workers)):
+            start = time.perf_counter()
+            inventory_pdf.export_pdf(db, os.path.join(out_dir, f"report_{workers}.pdf"), workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"{workers:>8}{elapsed:>10.2f}{pages / elapsed:>10.1f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
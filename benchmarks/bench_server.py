@@ -0,0 +1,135 @@
+"""Requests per second and latency of the HTTP API under concurrent clients
+
+Usage: python benchmarks/bench_server.py [--items 100000] [--clients 50] [--seconds 10] [--url URL]
+
+Without --url, a server is started in a subprocess on a synthetic database and
+stopped afterwards. Each client loops over a mix of requests: keyset-paged item
+browsing, single item lookups, search, low stock, stats and (with --writes)
+quantity updates, which all go through the server's single writer thread.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from common import REPO_ROOT, build_inventory_db
+
+
+async def client(session, url, n_items, deadline, latencies, errors, write_ratio, rng):
+    after_id = 0
+    while time.perf_counter() < deadline:
+        roll = rng.random()
+        if roll < write_ratio:
+            item_id = rng.randint(1, n_items)
+            method, path = "PUT", f"/items/{item_id}"
+            body = {"name": f"Item {item_id:06d}", "category_id": None, "quantity": rng.randint(0, 500),
+                    "price": 9.99, "min_stock": 10, "supplier": "Bench"}
+        else:
+            method, body = "GET", None
+            if roll < 0.4:
+                path = f"/items?after_id={after_id}&limit=100"
+            elif roll < 0.7:
+                path = f"/items/{rng.randint(1, n_items)}"
+            elif roll < 0.8:
+                path = f"/items?search=item%20{rng.randint(1, 999):03d}&limit=20"
+            elif roll < 0.9:
+                path = "/low-stock?limit=50"
+            else:
+                path = "/stats"
+
+        start = time.perf_counter()
+        try:
+            async with session.request(method, url + path, json=body) as response:
+                payload = await response.json() if response.status == 200 else None
+                if response.status >= 400:
+                    errors.append(response.status)
+                    continue
+        except Exception as e: # Connection errors count as failures, the run goes on
+            errors.append(type(e).__name__)
+            continue
+        latencies.append(time.perf_counter() - start)
+        if path.startswith("/items?after_id"):
+            after_id = payload["next_after_id"] or 0 # Wrap around at the end of the catalog
+
+
+async def load_test(url, n_items, clients, seconds, write_ratio, seed):
+    import aiohttp
+
+    latencies, errors = [], []
+    rng = random.Random(seed)
+    connector = aiohttp.TCPConnector(limit=clients)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*(client(session, url, n_items, deadline, latencies, errors, write_ratio,
+                                      random.Random(rng.random())) for _ in range(clients)))
+    return latencies, errors
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(db_path, readers):
+    port = free_port()
+    server = subprocess.Popen([sys.executable, os.path.join(REPO_ROOT, "inventory_server.py"), "--db", db_path,
+                               "--port", str(port), "--readers", str(readers)],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise SystemExit("The server exited during startup; is aiohttp installed?")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return server, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise SystemExit("The server did not start listening in time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--writes", type=float, default=0.05, help="fraction of requests that are updates")
+    parser.add_argument("--readers", type=int, default=8, help="reader threads of the started server")
+    parser.add_argument("--url", help="test a running server instead of starting one")
+    parser.add_argument("--db", default="bench_server.db")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        build_inventory_db(args.db, args.items)
+        server, url = start_server(args.db, args.readers)
+    try:
+        latencies, errors = asyncio.run(load_test(url.rstrip("/"), args.items, args.clients, args.seconds,
+                                                  args.writes, args.seed))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    print(f"{args.clients} clients, {args.seconds:g} s, {args.writes:.0%} writes against {url}")
+    print(f"requests: {len(latencies)}  errors: {len(errors)}  requests/s: {len(latencies) / args.seconds:.0f}")
+    if latencies:
+        def percentile(p):
+            return latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000
+        print(f"latency ms  mean {statistics.mean(latencies) * 1000:.1f}  p50 {percentile(0.5):.1f}  "
+              f"p95 {percentile(0.95):.1f}  p99 {percentile(0.99):.1f}")
+    if errors:
+        print("first errors:", errors[:5])
+
+
+if __name__ == "__main__":
+    main()
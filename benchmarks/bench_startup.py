@@ -0,0 +1,74 @@
+"""Module import time of the GUI and CLI entry points, measured with python -X importtime
+
+Usage: python benchmarks/bench_startup.py [--repeat 5] [--top 10]
+
+Each case runs in a fresh interpreter; the median total over --repeat runs is
+reported. "GUI, eager" adds what the GUI module used to import at load time:
+the matplotlib chart (now imported once the dashboard is shown), pyplot,
+pandas and reportlab. The slowest imports of the GUI module are listed last.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from common import REPO_ROOT
+
+CASES = [
+    ("CLI", "import inventory_cli"),
+    ("GUI", "import inventory_management_system"),
+    ("GUI, eager", "import inventory_management_system, inventory_chart, matplotlib.pyplot, pandas, "
+                   "reportlab.pdfgen.canvas"),
+]
+
+# -X importtime stderr line: "import time:  self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(statement):
+    """Run statement in a fresh interpreter; returns [(cumulative us, nesting depth, module)]"""
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=REPO_ROOT,
+                          env=env, capture_output=True, text=True, check=True)
+    times = []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            times.append((int(match.group(2)), len(match.group(3)) // 2, match.group(4)))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'entry point':<14}{'median ms':>12}{'min ms':>10}")
+    for label, statement in CASES:
+        try:
+            totals = [sum(us for us, depth, _ in import_times(statement) if depth == 0) / 1000
+                      for _ in range(args.repeat)]
+        except subprocess.CalledProcessError as e:
+            print(f"{label:<14}  skipped: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        print(f"{label:<14}{statistics.median(totals):>12.1f}{min(totals):>10.1f}")
+
+    # importtime lists a module's own imports just before the module itself
+    direct, children = [], []
+    for us, depth, module in import_times(CASES[1][1]):
+        if depth == 1:
+            children.append((us, module))
+        elif depth == 0:
+            if module == "inventory_management_system":
+                direct = children
+            children = []
+    print("\nSlowest imports made directly by the GUI module:")
+    for us, module in sorted(direct, reverse=True)[:args.top]:
+        print(f"  {us / 1000:>8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""Shared helpers for the benchmark scripts"""
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Benchmarks are run as scripts from the repository root or from this directory
+sys.path.insert(0, REPO_ROOT)
+
+
+def build_inventory_db(path, n_items=100_000, n_categories=50, seed=42):
+    """Create an inventory.db at path with n_items synthetic items, reusing it if it already matches"""
+    from generate_inventory import generate_inventory
+
+    return generate_inventory(path, n_items, n_categories, seed=seed)
+
+
+def time_per_call(func, repeat):
+    """Return the mean wall-clock time of func() in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
@@ -0,0 +1,65 @@
+"""Fixtures for the pytest-benchmark suite in suite/
+
+Every benchmark that uses inventory_rows runs once per catalog size given with
+--inventory-rows. The synthetic databases are built by generate_inventory and
+cached in pytest's cache directory, since a million-row catalog takes a while.
+"""
+import os
+
+import pytest
+
+from common import build_inventory_db
+from inventory_db import DatabaseManager
+
+collect_ignore_glob = ["bench_*.py"] # The standalone benchmark scripts next to this file
+
+
+def pytest_addoption(parser):
+    parser.addoption("--inventory-rows", default="1000",
+                     help="comma-separated catalog sizes to benchmark, e.g. 1000,100000,1000000 (default: 1000)")
+
+
+def pytest_generate_tests(metafunc):
+    if "inventory_rows" in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption("inventory_rows").split(",")]
+        metafunc.parametrize("inventory_rows", sizes, ids=[f"{size}rows" for size in sizes], scope="session")
+
+
+@pytest.fixture(scope="session")
+def inventory_path(request, tmp_path_factory, inventory_rows):
+    cache = getattr(request.config, "cache", None) # None when run with -p no:cacheprovider
+    directory = cache.mkdir("inventory") if cache else tmp_path_factory.mktemp("inventory")
+    return build_inventory_db(str(directory / f"inventory_{inventory_rows}.db"), inventory_rows)
+
+
+@pytest.fixture(scope="session")
+def db_manager(inventory_path):
+    db = DatabaseManager(inventory_path)
+    yield db
+    db.close()
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    widgets = pytest.importorskip("PyQt5.QtWidgets")
+    return widgets.QApplication.instance() or widgets.QApplication(["benchmarks"])
+
+
+@pytest.fixture(scope="session")
+def inventory_app(qapp, inventory_path):
+    """An InventoryApp window on the catalog, logged in as admin without showing the login dialog"""
+    import inventory_management_system as gui
+
+    def accept(dialog):
+        dialog.user_role = "admin"
+        return gui.QDialog.Accepted
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(gui.LoginDialog, "exec_", accept)
+        window = gui.InventoryApp(inventory_path)
+    window.change_timer.stop() # Nothing else writes to the catalog
+    window.show()
+    qapp.processEvents()
+    yield window
+    window.close()
@@ -0,0 +1,142 @@
+"""Reproducible synthetic inventory databases for benchmarks and load testing
+
+Usage: python benchmarks/generate_inventory.py bench_inventory.db [--items 100000] [--categories 50]
+           [--suppliers 200] [--skew 1.1] [--seed 42] [--force]
+
+The same arguments always produce the same categories and items. Categories
+and suppliers are drawn with Zipf-like popularity (a few large ones, a long
+tail of small ones), stock levels are log-normal with a share of out-of-stock
+and low-stock items, and items are dated in id order over two years. Rows are
+written through DatabaseManager.bulk_load, so the full-text index, counters
+and opening stock movements are built as for a real import.
+
+An existing file is only reused or replaced when it is itself a generated
+catalog; anything else, such as a real inventory.db, is left alone unless
+--force is given.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+import common  # noqa: F401  (puts the repository root on sys.path)
+from inventory_db import DatabaseManager
+
+PRODUCTS = ["Bolt", "Screw", "Washer", "Bracket", "Cable", "Adapter", "Filter", "Valve", "Bearing", "Gasket",
+            "Sensor", "Switch", "Fuse", "Hinge", "Clamp", "Spring", "Battery", "Lamp", "Hose", "Pump"]
+MATERIALS = ["Steel", "Brass", "Nylon", "Copper", "Rubber", "Aluminium", "Plastic", "Ceramic"]
+MIN_STOCK_LEVELS = [0, 5, 5, 10, 10, 10, 20, 25, 50]
+START_DATE = datetime(2024, 1, 1)
+SPAN_MINUTES = 2 * 365 * 24 * 60 # Items are dated over two years
+
+# Records the arguments a database was generated with, so it can be reused when they match
+CATALOG_TABLE = "synthetic_catalog"
+
+
+def popularity(n, skew):
+    """Cumulative Zipf-like weights for n choices; rank k gets weight 1 / k**skew"""
+    return list(itertools.accumulate(1 / k ** skew for k in range(1, n + 1)))
+
+
+def generate_items(n_items, n_categories, n_suppliers, skew, rng, uncategorized=0.02, out_of_stock=0.03):
+    """Yield item rows (name, category_id, quantity, price, min_stock, supplier, date_added) in id order"""
+    category_weights = popularity(n_categories, skew)
+    supplier_weights = popularity(n_suppliers, skew)
+    category_ids = range(1, n_categories + 1)
+    step = SPAN_MINUTES / max(n_items, 1)
+    for i in range(1, n_items + 1):
+        category_id = rng.choices(category_ids, cum_weights=category_weights)[0] if category_weights else None
+        if rng.random() < uncategorized:
+            category_id = None
+        quantity = 0 if rng.random() < out_of_stock else min(int(rng.lognormvariate(4.0, 1.2)), 100_000)
+        yield (
+            f"Item {i:06d} {rng.choice(MATERIALS)} {rng.choice(PRODUCTS)}",
+            category_id,
+            quantity,
+            round(max(rng.lognormvariate(2.5, 1.1), 0.5), 2),
+            rng.choice(MIN_STOCK_LEVELS),
+            f"Supplier {rng.choices(range(1, n_suppliers + 1), cum_weights=supplier_weights)[0]}",
+            (START_DATE + timedelta(minutes=int(i * step))).strftime("%Y-%m-%d %H:%M:%S"),
+        )
+
+
+def catalog_params(path):
+    """The arguments the database at path was generated with, or None if it is not a generated catalog"""
+    try:
+        # Read-only and without DatabaseManager, so a real database is not migrated or otherwise touched
+        conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+    except sqlite3.Error:
+        return None
+    try:
+        row = conn.execute(f"SELECT params FROM {CATALOG_TABLE}").fetchone()
+    except sqlite3.Error: # No marker table, or not a database at all
+        row = None
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def generate_inventory(path, n_items=100_000, n_categories=50, n_suppliers=200, skew=1.1, seed=42, force=False):
+    """Create a synthetic inventory database at path, or reuse the one there if it was generated alike
+
+    An existing file that is not a generated catalog raises FileExistsError
+    unless force is set. Returns path.
+    """
+    params = json.dumps({"items": n_items, "categories": n_categories, "suppliers": n_suppliers,
+                         "skew": skew, "seed": seed}, sort_keys=True)
+    if os.path.exists(path):
+        generated = catalog_params(path)
+        if generated == params:
+            return path
+        if generated is None and not force:
+            raise FileExistsError(f"{path} exists and is not a generated catalog; "
+                                  "pass force=True (--force) to overwrite it")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    rng = random.Random(seed)
+    db = DatabaseManager(path)
+    try:
+        with db.bulk_load() as conn:
+            conn.executemany("INSERT INTO categories (id, name, description) VALUES (?, ?, ?)",
+                             [(i, f"Category {i}", f"Synthetic category {i}") for i in range(1, n_categories + 1)])
+            conn.executemany("""
+                INSERT INTO items (name, category_id, quantity, price, min_stock, supplier, date_added)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, generate_items(n_items, n_categories, n_suppliers, skew, rng))
+            conn.execute(f"CREATE TABLE {CATALOG_TABLE} (params TEXT NOT NULL)")
+            conn.execute(f"INSERT INTO {CATALOG_TABLE} (params) VALUES (?)", (params,))
+        db.execute_query("PRAGMA optimize")
+    finally:
+        db.close()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--suppliers", type=int, default=200)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of category and supplier sizes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--force", action="store_true", help="overwrite an existing file that is not a generated catalog")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        generate_inventory(args.path, args.items, args.categories, args.suppliers, args.skew, args.seed, args.force)
+    except FileExistsError as e:
+        parser.exit(1, f"{parser.prog}: {e}\n")
+    print(f"{args.path}: {args.items} items in {args.categories} categories, "
+          f"{time.perf_counter() - start:.1f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Statement throughput of DatabaseManager and item list paging, search and counters"""
+
+
+def bench_execute_query_item_by_id(benchmark, db_manager, inventory_rows):
+    item_id = inventory_rows // 2
+    benchmark(db_manager.execute_query, "SELECT name, quantity FROM items WHERE id=?", (item_id,), True)
+
+
+def bench_execute_query_count_low_stock(benchmark, db_manager):
+    benchmark(db_manager.execute_query, "SELECT COUNT(*) FROM items WHERE is_low_stock", (), True)
+
+
+def bench_execute_query_update(benchmark, db_manager, inventory_rows):
+    item_id = inventory_rows // 2
+    benchmark(db_manager.execute_query, "UPDATE items SET price=price WHERE id=?", (item_id,))
+
+
+def bench_fetch_items_first_page(benchmark, db_manager):
+    benchmark(db_manager.fetch_items, limit=101)
+
+
+def bench_fetch_items_last_page(benchmark, db_manager, inventory_rows):
+    benchmark(db_manager.fetch_items, after_id=inventory_rows - 100, limit=101)
+
+
+def bench_fetch_items_by_name_deep_page(benchmark, db_manager, inventory_rows):
+    last = db_manager.get_item(inventory_rows - 100) # Keyset of a page near the end of the name order
+    benchmark(db_manager.fetch_items, sort="name", after_id=last['id'], after_value=last['name'], limit=101)
+
+
+def bench_fetch_items_search(benchmark, db_manager):
+    benchmark(db_manager.fetch_items, "steel bolt", limit=101)
+
+
+def bench_fetch_items_low_stock(benchmark, db_manager):
+    benchmark(db_manager.fetch_items, low_stock=True, limit=101)
+
+
+def bench_dashboard_stats_uncached(benchmark, db_manager):
+    def drop_cache():
+        db_manager._local.stats_cache = None # As after any write
+
+    benchmark.pedantic(db_manager.get_dashboard_stats, setup=drop_cache, rounds=200)
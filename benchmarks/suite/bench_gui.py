@@ -0,0 +1,32 @@
+"""Items tab and dashboard refreshes of the GUI, under the offscreen Qt platform"""
+
+
+def bench_load_items(benchmark, inventory_app):
+    benchmark(inventory_app.load_items)
+
+
+def bench_filter_items_search(benchmark, inventory_app):
+    inventory_app.search_input.setText("steel bolt")
+    try:
+        benchmark(inventory_app.filter_items)
+    finally:
+        inventory_app.search_input.clear()
+        inventory_app.filter_items()
+
+
+def bench_filter_items_category(benchmark, inventory_app):
+    inventory_app.category_filter.blockSignals(True)
+    inventory_app.category_filter.setCurrentIndex(1)
+    try:
+        benchmark(inventory_app.filter_items)
+    finally:
+        inventory_app.category_filter.setCurrentIndex(0)
+        inventory_app.category_filter.blockSignals(False)
+        inventory_app.filter_items()
+
+
+def bench_update_dashboard(benchmark, inventory_app):
+    def drop_cache():
+        inventory_app.db_manager._local.stats_cache = None # As after any write
+
+    benchmark.pedantic(inventory_app.update_dashboard, setup=drop_cache, rounds=50)
@@ -0,0 +1,20 @@
+"""Report rendering and file exports; slow at large sizes, so each runs a fixed few rounds"""
+import pytest
+
+import inventory_export
+import inventory_reports
+
+
+@pytest.mark.parametrize("name", list(inventory_reports.REPORTS))
+def bench_report(benchmark, db_manager, name):
+    benchmark.pedantic(inventory_reports.render_report, args=(name, db_manager), rounds=3)
+
+
+@pytest.mark.parametrize("export_format", list(inventory_export.EXPORT_FORMATS))
+def bench_export(benchmark, db_manager, tmp_path, export_format):
+    filename = str(tmp_path / f"inventory{inventory_export.EXPORT_FORMATS[export_format][1]}")
+    try:
+        inventory_export.write_export(db_manager, export_format, filename) # Warm up, and skip missing writers
+    except ImportError as e:
+        pytest.skip(str(e))
+    benchmark.pedantic(inventory_export.write_export, args=(db_manager, export_format, filename), rounds=3)
@@ -0,0 +1,86 @@
+"""Dashboard stock-level bar chart
+
+Kept apart from the main window module because importing matplotlib and its
+Qt backend is a large part of startup time; the window imports this module the
+first time the dashboard is shown.
+"""
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+
+
+class ChartWidget(FigureCanvas):
+    MAX_BARS = 10
+
+    def __init__(self, parent=None):
+        self.figure = Figure(figsize=(8, 6), facecolor='white')
+        super().__init__(self.figure)
+        self.setParent(parent)
+
+        # Axes, bars and the empty-state message are created once and updated in place.
+        # Bars are animated so full draws leave them out of the cached background used for blitting.
+        self.ax = self.figure.add_subplot(111)
+        self.bars = self.ax.bar(range(self.MAX_BARS), [0] * self.MAX_BARS, animated=True)
+        self.ax.set_ylabel('Quantity')
+        self.ax.set_title('Top 10 Item Stock Levels')
+        self.ax.grid(axis='y', linestyle='--', alpha=0.7) # Add grid for better readability
+        self.empty_text = self.ax.text(0.5, 0.5, "No item data available for chart.",
+                                       horizontalalignment='center', verticalalignment='center',
+                                       transform=self.ax.transAxes, fontsize=12, color='gray', visible=False)
+
+        self._data = None        # Last plotted data, to skip redraws when nothing changed
+        self._labels = None
+        self._background = None  # Axes pixels without the bars, captured after each full draw
+        self.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        """Cache the static background and paint the animated bars over it"""
+        self._background = self.copy_from_bbox(self.ax.bbox)
+        self._draw_bars()
+
+    def _draw_bars(self):
+        for bar in self.bars:
+            if bar.get_visible():
+                self.ax.draw_artist(bar)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.figure.tight_layout()
+
+    def plot_stock_levels(self, data):
+        data = [tuple(entry) for entry in data]
+        if data == self._data:
+            return # Top 10 unchanged, nothing to redraw
+        self._data = data
+
+        labels = [name for name, _ in data]
+        quantities = [quantity or 0 for _, quantity in data]
+        for i, bar in enumerate(self.bars):
+            if i < len(data):
+                q = quantities[i]
+                bar.set_height(q)
+                bar.set_color('red' if q <= 0 else 'orange' if q < 10 else 'green') # Improved color logic
+                bar.set_visible(True)
+            else:
+                bar.set_visible(False)
+
+        # Rescale only when bars would overflow or shrink to under half the axis, so most updates can blit.
+        # The axis never goes below 1, so an all-zero chart (empty or sold-out catalog) keeps blitting.
+        bottom, top = self.ax.get_ylim()
+        high = max(quantities, default=0)
+        low = min(quantities + [0])
+        needs_rescale = high > top or low < bottom or (top > 1 and high < top / 2)
+
+        if labels != self._labels or needs_rescale or self._background is None:
+            self._labels = labels
+            self.ax.set_xticks(range(len(labels)))
+            self.ax.set_xticklabels(labels, rotation=45, ha='right')
+            self.ax.set_xlim(-0.5, max(len(labels), 1) - 0.5)
+            self.ax.set_ylim(low * 1.1, max(high * 1.1, 1))
+            self.empty_text.set_visible(not data)
+            self.figure.tight_layout()
+            self.draw_idle() # Full redraw; _on_draw re-captures the background and paints the bars
+        else:
+            # Only bar heights or colors changed: restore the background and blit the bars
+            self.restore_region(self._background)
+            self._draw_bars()
+            self.blit(self.ax.bbox)
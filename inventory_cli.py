@@ -0,0 +1,174 @@
+"""Headless command-line interface for reports, exports and imports
+
+Runs without a display and without importing PyQt5 or matplotlib, so it suits
+scheduled jobs on servers. Examples:
+
+    python inventory_cli.py report low-stock
+    python inventory_cli.py report inventory -o inventory.txt
+    python inventory_cli.py export xlsx inventory.xlsx
+    python inventory_cli.py import catalog.csv --rejects rejected.csv
+    python inventory_cli.py --profile profile.json export csv inventory.csv
+    python inventory_cli.py migrate --dry-run
+
+Progress goes to stderr, so report text can be piped. The exit status is 0 on
+success, 1 when the command fails and 2 for usage errors.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+import inventory_export
+import inventory_import
+import inventory_reports
+from inventory_db import DatabaseManager
+from inventory_profiling import Profiler
+
+
+class ProgressPrinter:
+    """progress(done, total) callback that redraws one stderr line, at most every 0.2 seconds"""
+
+    def __init__(self, label, enabled=True):
+        self.label = label
+        self.enabled = enabled and sys.stderr.isatty()
+        self._last = 0.0
+
+    def __call__(self, done, total):
+        now = time.monotonic()
+        if not self.enabled or now - self._last < 0.2:
+            return
+        self._last = now
+        percent = f" {done * 100 // total}%" if total else ""
+        sys.stderr.write(f"\r{self.label}: {done}/{total}{percent}")
+        sys.stderr.flush()
+
+    def finish(self):
+        if self.enabled and self._last:
+            sys.stderr.write("\r\033[K") # Clear the progress line
+
+
+def run_report(db_manager, args):
+    """Write a report to args.output, or stdout"""
+    progress = ProgressPrinter(f"{args.name} report", not args.quiet)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for chunk in inventory_reports.REPORTS[args.name](db_manager, progress):
+            out.write(chunk)
+            out.write("\n")
+    finally:
+        progress.finish()
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+def run_export(db_manager, args):
+    """Export the inventory to args.filename in args.format"""
+    progress = ProgressPrinter(f"{args.format} export", not args.quiet)
+    try:
+        rows = inventory_export.write_export(db_manager, args.format, args.filename, progress)
+    finally:
+        progress.finish()
+    if not args.quiet:
+        print(f"Exported {rows} items to {args.filename}", file=sys.stderr)
+    return 0
+
+
+def run_import(db_manager, args):
+    """Bulk import items from a CSV or .xlsx file"""
+    progress = ProgressPrinter("import", not args.quiet)
+    try:
+        result = inventory_import.import_items(db_manager, args.filename, batch_size=args.batch_size,
+                                               progress=progress, rejects_file=args.rejects)
+    finally:
+        progress.finish()
+    if not args.quiet:
+        print(result.summary(), file=sys.stderr)
+        if result.rejected and not result.rejects_file:
+            for line, reason, _ in result.rejects[:10]:
+                print(f"  line {line}: {reason}", file=sys.stderr)
+    return 1 if args.strict and result.rejected else 0
+
+
+def run_migrate(db_manager, args):
+    """Apply pending schema migrations, or list them with --dry-run, timing each step"""
+    pending = db_manager.pending_migrations()
+    if args.dry_run:
+        print(f"Schema version {db_manager.schema_version()}, {len(pending)} pending")
+        for version, description, *_ in pending:
+            print(f"  {version}: {description}")
+        return 0
+    progress = ProgressPrinter("migrate", not args.quiet)
+    try:
+        applied = db_manager.migrate(progress)
+    finally:
+        progress.finish()
+    if not args.quiet:
+        for version, description, seconds in applied:
+            print(f"Migrated to version {version} in {seconds:.2f} s: {description}", file=sys.stderr)
+        print(f"Schema version {db_manager.schema_version()}", file=sys.stderr)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="inventory_cli",
+                                     description="Inventory reports, exports and imports without the GUI")
+    parser.add_argument("--db", default="inventory.db", help="database file (default: inventory.db)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress or summary on stderr")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="write query timings to FILE: Prometheus text for .prom/.txt, JSON otherwise")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    report = commands.add_parser("report", help="print a report")
+    report.add_argument("name", choices=list(inventory_reports.REPORTS))
+    report.add_argument("-o", "--output", help="write to this file instead of stdout")
+    report.set_defaults(func=run_report)
+
+    export = commands.add_parser("export", help="export the inventory to a file")
+    export.add_argument("format", choices=list(inventory_export.EXPORT_FORMATS))
+    export.add_argument("filename")
+    export.set_defaults(func=run_export)
+
+    import_ = commands.add_parser("import", help="bulk import items from a CSV or .xlsx file")
+    import_.add_argument("filename")
+    import_.add_argument("--rejects", help="write rejected rows to this CSV file")
+    import_.add_argument("--batch-size", type=int, default=inventory_import.BATCH_SIZE)
+    import_.add_argument("--strict", action="store_true", help="exit with status 1 if any row is rejected")
+    import_.set_defaults(func=run_import)
+
+    migrate = commands.add_parser("migrate", help="upgrade the database schema, timing each step")
+    migrate.add_argument("--dry-run", action="store_true", help="only list the pending steps")
+    migrate.set_defaults(func=run_migrate)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    profiler = Profiler() if args.profile else None
+    db_manager = None
+    try:
+        # Opening creates or upgrades the schema, so a locked or unreadable database fails here;
+        # commands other than migrate migrate on opening, as the GUI and server do
+        db_manager = DatabaseManager(args.db, profiler, migrate=args.command != "migrate")
+        with db_manager.profile(args.command):
+            return args.func(db_manager, args)
+    except BrokenPipeError:
+        # Output was piped into something like head that stopped reading
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (OSError, ValueError, ImportError, sqlite3.Error) as e:
+        print(f"inventory_cli: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print("inventory_cli: interrupted", file=sys.stderr)
+        return 130
+    finally:
+        if db_manager is not None:
+            db_manager.close()
+        if profiler is not None:
+            profiler.dump(args.profile)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
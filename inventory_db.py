@@ -0,0 +1,804 @@
+"""SQLite storage for the inventory: schema, pooled connections and item queries
+
+DatabaseManager has no GUI dependencies, so the desktop app, the command-line
+tool and the benchmarks all share it.
+"""
+import hashlib
+import re
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+from inventory_profiling import Profiler
+
+
+class CategoryCache:
+    """In-memory id -> name map of all categories
+
+    Loaded on first use and reloaded only after invalidate(), which every category write
+    through DatabaseManager calls. version goes up on each invalidation, so views can
+    skip rebuilding their category lists when it has not moved.
+    """
+
+    def __init__(self, db_manager):
+        self._db_manager = db_manager
+        self._lock = threading.Lock()
+        self.version = 0
+        self._names = None # id -> name, in name order
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._names = None
+
+    def snapshot(self):
+        """Return (version, {id: name} in name order), loading the categories if needed"""
+        with self._lock:
+            if self._names is None:
+                rows = self._db_manager.execute_query("SELECT id, name FROM categories ORDER BY name ASC", fetch=True)
+                self._names = {row['id']: row['name'] for row in rows}
+            return self.version, self._names
+
+    def name_of(self, category_id):
+        return self.snapshot()[1].get(category_id)
+
+
+class ItemRecord:
+    """Typed values of one item row as returned by DatabaseManager.fetch_items"""
+    __slots__ = ("id", "name", "category_id", "category_name", "quantity", "price", "min_stock", "supplier",
+                 "date_added")
+
+    def __init__(self, id, name, category_id, category_name, quantity, price, min_stock, supplier, date_added):
+        self.id = id
+        self.name = name
+        self.category_id = category_id     # None when uncategorized
+        self.category_name = category_name # None when uncategorized
+        self.quantity = quantity
+        self.price = price
+        self.min_stock = min_stock
+        self.supplier = supplier
+        self.date_added = date_added
+
+    @classmethod
+    def from_row(cls, row):
+        # Ensure values are robust to NULLs in older rows
+        return cls(row['id'], str(row['name'] or ""), row['category_id'] or None, row['category_name'],
+                   int(row['quantity'] or 0), float(row['price'] or 0.0), int(row['min_stock'] or 0),
+                   str(row['supplier'] or ""), str(row['date_added'] or ""))
+
+    @property
+    def is_low_stock(self):
+        return self.quantity <= self.min_stock
+
+
+class DatabaseManager:
+    # Applied to every connection when it is opened. WAL lets readers run alongside a writer,
+    # synchronous=NORMAL is durable in WAL mode without an fsync per commit.
+    CONNECTION_PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA cache_size=-65536",    # 64 MB page cache (negative value means KiB)
+        "PRAGMA mmap_size=268435456",  # 256 MB memory-mapped I/O
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA foreign_keys=ON",      # Per connection; makes ON DELETE SET NULL on items.category_id fire
+    )
+
+    # Schema versions, applied in order by migrate() and recorded in PRAGMA user_version:
+    # (version, description, method, *args). Each step runs once in its own write transaction,
+    # is timed on its own and must not commit; schema changes go into a new step with the next
+    # version. Every step up to 15 is IF NOT EXISTS, so databases created before versions were
+    # tracked get just what they lack, and the slow ones (index builds, the full-text backfill)
+    # show up as separate steps.
+    MIGRATIONS = [
+        (1, "Users, categories and items tables", "_migrate_tables"),
+        (2, "Low-stock column on items", "_migrate_low_stock_column"),
+        (3, "Stock movement ledger", "_migrate_stock_movements"),
+        (4, "Index stock movements by item and time", "_migrate_stock_movement_indexes"),
+        (5, "Index items by category", "_migrate_item_index", "idx_items_category_id"),
+        (6, "Index items by name", "_migrate_item_index", "idx_items_name_nocase"),
+        (7, "Index items by quantity", "_migrate_item_index", "idx_items_quantity"),
+        (8, "Index items by price", "_migrate_item_index", "idx_items_price"),
+        (9, "Index items by minimum stock", "_migrate_item_index", "idx_items_min_stock"),
+        (10, "Index items by supplier", "_migrate_item_index", "idx_items_supplier_nocase"),
+        (11, "Index items by date added", "_migrate_item_index", "idx_items_date_added"),
+        (12, "Partial index of low-stock items", "_migrate_item_index", "idx_items_low_stock"),
+        (13, "Dashboard counters", "_migrate_inventory_stats"),
+        (14, "Change log for syncing other instances", "_migrate_change_log"),
+        (15, "Full-text search index and backfill", "_migrate_full_text"),
+        (16, "Clear dangling references before enforcing foreign keys", "_migrate_foreign_keys"),
+    ]
+
+    # Secondary indexes on items; bulk loads drop them and build each once at the end
+    ITEM_INDEXES = {
+        # Item search, category filter and lowest-stock chart
+        "idx_items_category_id": "CREATE INDEX IF NOT EXISTS idx_items_category_id ON items (category_id)",
+        "idx_items_name_nocase": "CREATE INDEX IF NOT EXISTS idx_items_name_nocase ON items (name COLLATE NOCASE)",
+        "idx_items_quantity": "CREATE INDEX IF NOT EXISTS idx_items_quantity ON items (quantity)",
+        # Sorting the item list on the other columns
+        "idx_items_price": "CREATE INDEX IF NOT EXISTS idx_items_price ON items (price)",
+        "idx_items_min_stock": "CREATE INDEX IF NOT EXISTS idx_items_min_stock ON items (min_stock)",
+        "idx_items_supplier_nocase":
+            "CREATE INDEX IF NOT EXISTS idx_items_supplier_nocase ON items (supplier COLLATE NOCASE)",
+        "idx_items_date_added": "CREATE INDEX IF NOT EXISTS idx_items_date_added ON items (date_added)",
+        # Partial index over just the low-stock rows, in report order; low-stock counts, reports
+        # and lists read these rows instead of comparing two columns across the whole table
+        "idx_items_low_stock": "CREATE INDEX IF NOT EXISTS idx_items_low_stock ON items (quantity) WHERE is_low_stock",
+    }
+
+    # Entries kept in change_log; a reader that falls further behind reloads everything
+    CHANGE_LOG_SIZE = 10000
+
+    # Appends one change_log entry per written row and trims the oldest beyond CHANGE_LOG_SIZE
+    CHANGE_LOG_TRIGGER = '''CREATE TRIGGER IF NOT EXISTS {table}_changes_{op} AFTER {event} ON {table} BEGIN
+                INSERT INTO change_log (table_name, row_id, op) VALUES ('{table}', {row}.id, '{op}');
+                DELETE FROM change_log WHERE id <= last_insert_rowid() - {size};
+            END'''
+
+    # Per-row insert triggers; bulk loads drop them and do their work in one set-based pass
+    ITEM_INSERT_TRIGGERS = {
+        "items_fts_insert": '''CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items BEGIN
+                INSERT INTO items_fts (rowid, name, supplier, category)
+                VALUES (new.id, new.name, new.supplier, (SELECT name FROM categories WHERE id = new.category_id));
+            END''',
+        "items_stats_insert": '''CREATE TRIGGER IF NOT EXISTS items_stats_insert AFTER INSERT ON items BEGIN
+                UPDATE inventory_stats SET total_items = total_items + 1,
+                    low_stock_items = low_stock_items + COALESCE(new.quantity <= new.min_stock, 0)
+                WHERE id = 1;
+            END''',
+        "items_changes_insert": CHANGE_LOG_TRIGGER.format(table="items", op="insert", event="INSERT", row="new",
+                                                          size=CHANGE_LOG_SIZE),
+    }
+
+    # Adds items with id > ? to the full-text index
+    FTS_BACKFILL = '''INSERT INTO items_fts (rowid, name, supplier, category)
+        SELECT i.id, i.name, i.supplier, c.name
+        FROM items i LEFT JOIN categories c ON i.category_id = c.id
+        WHERE i.id > ?'''
+
+    STATS_RECOUNT = '''UPDATE inventory_stats SET
+        total_items = (SELECT COUNT(*) FROM items),
+        low_stock_items = (SELECT COUNT(*) FROM items WHERE is_low_stock),
+        total_categories = (SELECT COUNT(*) FROM categories)
+        WHERE id = 1'''
+
+    # Columns item lists can be sorted and keyset-paged on -> SQL expression; each one has
+    # an index (ids are the rowid, category names have the UNIQUE index on categories),
+    # so seeking to any page is an index lookup
+    SORT_COLUMNS = {
+        "id": "i.id",
+        "name": "i.name COLLATE NOCASE",
+        "category": "c.name",
+        "quantity": "i.quantity",
+        "price": "i.price",
+        "min_stock": "i.min_stock",
+        "supplier": "i.supplier COLLATE NOCASE",
+        "date_added": "i.date_added",
+    }
+
+    def __init__(self, db_name="inventory.db", profiler=None, migrate=True):
+        self.db_name = db_name
+        # Opt-in statement profiling (see inventory_profiling); None costs nothing
+        self.profiler = profiler if profiler is not None else Profiler.from_env()
+        self.categories = CategoryCache(self)
+        self._local = threading.local() # One long-lived connection per thread
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self.applied_migrations = [] # (version, description, seconds) of the steps run when opening
+        if migrate:
+            self.init_database()
+
+    def get_connection(self):
+        """Return the calling thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # check_same_thread is off only so close() can shut every connection down;
+            # each connection is still used exclusively by the thread that opened it.
+            conn = sqlite3.connect(self.db_name, check_same_thread=False)
+            conn.row_factory = sqlite3.Row # Allows accessing columns by name
+            for pragma in self.CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        """Close every connection opened by this manager"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def release_connection(self):
+        """Close the calling thread's connection, e.g. when a worker thread finishes a job"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.conn = None
+            self._local.stats_cache = None
+            with self._connections_lock:
+                if conn in self._connections:
+                    self._connections.remove(conn)
+            conn.close()
+
+    def init_database(self):
+        """Bring the schema up to date by applying the pending MIGRATIONS"""
+        self.applied_migrations = self.migrate()
+
+    def schema_version(self):
+        return self.get_connection().execute("PRAGMA user_version").fetchone()[0]
+
+    def pending_migrations(self):
+        """Return the (version, description, method, *args) entries of MIGRATIONS not applied yet"""
+        version = self.schema_version()
+        return [migration for migration in self.MIGRATIONS if migration[0] > version]
+
+    def migrate(self, progress=None):
+        """Apply the pending migrations in order and return [(version, description, seconds)]
+
+        Each step is one write transaction that also sets user_version, so a failed step
+        leaves the database at the previous version, and a step another process applied
+        meanwhile is skipped. Steps are timed as operations when profiling is on.
+        """
+        pending = self.pending_migrations()
+        applied = []
+        for done, (version, description, method, *args) in enumerate(pending, 1):
+            start = time.perf_counter()
+            with self.profile(f"migration {version}"), self.transaction() as conn:
+                if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+                    continue
+                getattr(self, method)(conn, *args)
+                conn.execute(f"PRAGMA user_version = {version:d}")
+            applied.append((version, description, time.perf_counter() - start))
+            if progress:
+                progress(done, len(pending))
+        return applied
+
+    def _migrate_tables(self, conn):
+        conn.execute('''CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY, username TEXT UNIQUE, password TEXT, role TEXT)''')
+        conn.execute('''CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY, name TEXT UNIQUE, description TEXT)''')
+
+        # Items table with ON DELETE SET NULL for category_id
+        # This means if a category is deleted, items previously in that category will have category_id set to NULL.
+        # is_low_stock is computed from quantity and min_stock, so it can never go stale
+        conn.execute('''CREATE TABLE IF NOT EXISTS items (
+            id INTEGER PRIMARY KEY, name TEXT, category_id INTEGER, quantity INTEGER,
+            price REAL, min_stock INTEGER, supplier TEXT, date_added TEXT,
+            is_low_stock INTEGER GENERATED ALWAYS AS (quantity <= min_stock) VIRTUAL,
+            FOREIGN KEY (category_id) REFERENCES categories (id) ON DELETE SET NULL)''')
+
+        # Add default admin user
+        # Check if admin already exists to prevent integrity errors on subsequent runs
+        conn.execute("INSERT OR IGNORE INTO users (username, password, role) VALUES ('admin', ?, 'admin')",
+                     (hashlib.sha256('admin'.encode()).hexdigest(),))
+
+    def _migrate_low_stock_column(self, conn):
+        columns = [row['name'] for row in conn.execute("PRAGMA table_xinfo(items)")]
+        if "is_low_stock" not in columns: # Databases created before the column existed
+            conn.execute('''ALTER TABLE items ADD COLUMN
+                is_low_stock INTEGER GENERATED ALWAYS AS (quantity <= min_stock) VIRTUAL''')
+
+    def _migrate_stock_movements(self, conn):
+        # Stock movement ledger: every quantity change with its reason and the resulting stock
+        conn.execute('''CREATE TABLE IF NOT EXISTS stock_movements (
+            id INTEGER PRIMARY KEY, item_id INTEGER NOT NULL REFERENCES items (id),
+            delta INTEGER NOT NULL, quantity_after INTEGER NOT NULL, reason TEXT NOT NULL,
+            created_at TEXT NOT NULL)''')
+        conn.execute('''CREATE TRIGGER IF NOT EXISTS items_movements_delete AFTER DELETE ON items BEGIN
+                DELETE FROM stock_movements WHERE item_id = old.id;
+            END''')
+
+    def _migrate_stock_movement_indexes(self, conn):
+        # Per-item history, newest first
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_stock_movements_item_time ON stock_movements (item_id, created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_stock_movements_time ON stock_movements (created_at)")
+
+    def _migrate_item_index(self, conn, name):
+        conn.execute(self.ITEM_INDEXES[name])
+
+    def _migrate_inventory_stats(self, conn):
+        # Dashboard counters, maintained by triggers so reading them never scans items
+        conn.execute('''CREATE TABLE IF NOT EXISTS inventory_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1), total_items INTEGER NOT NULL,
+            low_stock_items INTEGER NOT NULL, total_categories INTEGER NOT NULL)''')
+        cursor = conn.execute('''INSERT OR IGNORE INTO inventory_stats (id, total_items, low_stock_items, total_categories)
+            VALUES (1, 0, 0, 0)''')
+        if cursor.rowcount:
+            conn.execute(self.STATS_RECOUNT) # Seed the counters from existing rows
+        for trigger_sql in (
+            self.ITEM_INSERT_TRIGGERS["items_stats_insert"],
+            '''CREATE TRIGGER IF NOT EXISTS items_stats_update AFTER UPDATE OF quantity, min_stock ON items BEGIN
+                UPDATE inventory_stats SET low_stock_items = low_stock_items
+                    + COALESCE(new.quantity <= new.min_stock, 0) - COALESCE(old.quantity <= old.min_stock, 0)
+                WHERE id = 1;
+            END''',
+            '''CREATE TRIGGER IF NOT EXISTS items_stats_delete AFTER DELETE ON items BEGIN
+                UPDATE inventory_stats SET total_items = total_items - 1,
+                    low_stock_items = low_stock_items - COALESCE(old.quantity <= old.min_stock, 0)
+                WHERE id = 1;
+            END''',
+            '''CREATE TRIGGER IF NOT EXISTS categories_stats_insert AFTER INSERT ON categories BEGIN
+                UPDATE inventory_stats SET total_categories = total_categories + 1 WHERE id = 1;
+            END''',
+            '''CREATE TRIGGER IF NOT EXISTS categories_stats_delete AFTER DELETE ON categories BEGIN
+                UPDATE inventory_stats SET total_categories = total_categories - 1 WHERE id = 1;
+            END''',
+        ):
+            conn.execute(trigger_sql) # One by one: executescript would commit the migration half way
+
+    def _migrate_change_log(self, conn):
+        # Rows written to items and categories, newest last, so other instances can apply just those.
+        # op is insert, update or delete; bulk_insert means every item with id > row_id is new.
+        conn.execute('''CREATE TABLE IF NOT EXISTS change_log (
+            id INTEGER PRIMARY KEY, table_name TEXT NOT NULL, row_id INTEGER NOT NULL, op TEXT NOT NULL)''')
+        conn.execute(self.ITEM_INSERT_TRIGGERS["items_changes_insert"])
+        for table, op, row in (("items", "update", "new"), ("items", "delete", "old"), ("categories", "insert", "new"),
+                               ("categories", "update", "new"), ("categories", "delete", "old")):
+            conn.execute(self.CHANGE_LOG_TRIGGER.format(table=table, op=op, event=op.upper(), row=row,
+                                                        size=self.CHANGE_LOG_SIZE))
+
+    def _migrate_full_text(self, conn):
+        # Full-text index over item name, supplier and category name; rowid is the item id
+        fts_exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='items_fts'").fetchone()
+        conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+            name, supplier, category, tokenize='unicode61 remove_diacritics 2', prefix='2 3')''')
+        if not fts_exists:
+            # Index items that were added before the full-text table existed
+            conn.execute(self.FTS_BACKFILL, (0,))
+        for trigger_sql in (
+            self.ITEM_INSERT_TRIGGERS["items_fts_insert"],
+            '''CREATE TRIGGER IF NOT EXISTS items_fts_update AFTER UPDATE OF name, supplier, category_id ON items BEGIN
+                UPDATE items_fts SET name = new.name, supplier = new.supplier,
+                    category = (SELECT name FROM categories WHERE id = new.category_id)
+                WHERE rowid = old.id;
+            END''',
+            '''CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON items BEGIN
+                DELETE FROM items_fts WHERE rowid = old.id;
+            END''',
+            '''CREATE TRIGGER IF NOT EXISTS categories_fts_insert AFTER INSERT ON categories BEGIN
+                UPDATE items_fts SET category = new.name
+                WHERE rowid IN (SELECT id FROM items WHERE category_id = new.id);
+            END''',
+            '''CREATE TRIGGER IF NOT EXISTS categories_fts_update AFTER UPDATE OF name ON categories BEGIN
+                UPDATE items_fts SET category = new.name
+                WHERE rowid IN (SELECT id FROM items WHERE category_id = new.id);
+            END''',
+            '''CREATE TRIGGER IF NOT EXISTS categories_fts_delete AFTER DELETE ON categories BEGIN
+                UPDATE items_fts SET category = NULL
+                WHERE rowid IN (SELECT id FROM items WHERE category_id = old.id);
+            END''',
+        ):
+            conn.execute(trigger_sql)
+
+    def _migrate_foreign_keys(self, conn):
+        # Foreign keys were not enforced before, so references to deleted rows may have piled up
+        conn.execute('''UPDATE items SET category_id = NULL
+            WHERE category_id IS NOT NULL AND category_id NOT IN (SELECT id FROM categories)''')
+        conn.execute("DELETE FROM stock_movements WHERE item_id NOT IN (SELECT id FROM items)")
+        violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+        if violations:
+            raise sqlite3.IntegrityError(f"{len(violations)} rows still violate foreign keys, "
+                                         f"e.g. {tuple(violations[0])}")
+
+    @staticmethod
+    def build_search_query(text):
+        """Turn free text into an FTS5 query: every word must match as a prefix"""
+        terms = re.findall(r"\w+", text)
+        return " ".join(f'"{term}"*' for term in terms)
+
+    def fetch_items(self, search="", category_id=None, after_id=0, offset=0, limit=None, item_id=None,
+                    low_stock=False, sort="id", descending=False, after_value=None, before_id=None,
+                    before_value=None):
+        """Fetch joined item rows, optionally filtered by a full-text search, a category, an id and low stock
+
+        Without a search, rows are sorted on one of SORT_COLUMNS (ties broken by id) and paged
+        by keyset: after_id/after_value are the id and sort value of the last row of the previous
+        page, before_id/before_value those of the first row of the next one. Seeking works the
+        same on every page, however deep. Search results are ranked by bm25 (name matches weigh
+        most) unless sorted on a column other than id, and are paged with offset.
+        """
+        match = self.build_search_query(search) if search else ""
+        conditions = []
+        params = []
+        expr = self.SORT_COLUMNS[sort]
+        backwards = not match and before_id is not None # Walk back from before_id, then flip the rows
+        ascending = descending == backwards
+        direction = "ASC" if ascending else "DESC"
+        order_by = f"i.id {direction}" if sort == "id" else f"{expr} {direction}, i.id {direction}"
+        source = "items i LEFT JOIN categories c ON i.category_id = c.id"
+        segments = [(False, "", [])] # Keyset ranges, queried in turn until the page is full
+        if match:
+            source = "items_fts f JOIN items i ON i.id = f.rowid LEFT JOIN categories c ON i.category_id = c.id"
+            conditions.append("items_fts MATCH ?")
+            params.append(match)
+            if sort == "id":
+                order_by = "bm25(items_fts, 10.0, 1.0, 5.0), i.id"
+        else:
+            key_id, key_value = (before_id, before_value) if backwards else (after_id, after_value)
+            if sort == "id":
+                if key_id:
+                    segments = [(False, f"i.id {'>' if ascending else '<'} ?", [key_id])]
+            elif sort == "category":
+                # Walk categories in name order and each one's items through idx_items_category_id,
+                # since a LEFT JOIN would visit every item; uncategorized items are a range of their own
+                segments = self._seek(expr, "i.category_id IS NULL", key_id, key_value, ascending)
+            elif key_id:
+                segments = self._seek(expr, f"{expr} IS NULL", key_id, key_value, ascending)
+        if category_id:
+            conditions.append("i.category_id = ?")
+            params.append(category_id)
+        if item_id is not None:
+            conditions.append("i.id = ?")
+            params.append(item_id)
+        if low_stock:
+            conditions.append("i.is_low_stock") # Matches the partial index idx_items_low_stock
+
+        rows = []
+        for values_range, seek, seek_params in segments:
+            where = " AND ".join(conditions + [seek] if seek else conditions) or "1"
+            from_, segment_order = source, order_by
+            if sort == "category" and not match:
+                if values_range: # CROSS JOIN keeps c outermost; c.id tells SQLite each name is one category
+                    from_ = "categories c CROSS JOIN items i ON i.category_id = c.id"
+                    segment_order = f"c.name {direction}, c.id {direction}, i.id {direction}"
+                else:
+                    segment_order = f"i.id {direction}"
+            query = f"""
+                SELECT i.id, i.name, i.category_id, c.name AS category_name, i.quantity, i.price,
+                       i.min_stock, i.supplier, i.date_added
+                FROM {from_}
+                WHERE {where}
+                ORDER BY {segment_order}
+            """
+            query_params = params + seek_params
+            if limit is not None:
+                query += " LIMIT ? OFFSET ?"
+                query_params += [limit - len(rows), offset if match else 0]
+            rows += self.execute_query(query, query_params, fetch=True)
+            if limit is not None and len(rows) >= limit:
+                break
+        return rows[::-1] if backwards else rows
+
+    @staticmethod
+    def _seek(expr, null_test, key_id, key_value, ascending):
+        """Return [(values range, condition, params)] for the rows after (key_value, key_id) in sort order
+
+        Each range is a single index seek: the rest of the rows sharing key_value (expr = v
+        AND id > k), then the values beyond it (expr > v). A row-value or OR condition would
+        walk every duplicate of v, and SQLite cannot match row values to a collated index.
+        NULLs sort before every value and never compare true, so they are a range of their
+        own, ahead of the values going up and after them going down. Without a key_id, the
+        ranges cover every row.
+        """
+        op = ">" if ascending else "<"
+        nulls = (False, null_test, [])
+        values = (True, f"{expr} IS NOT NULL", [])
+        if key_id and key_value is None:
+            nulls = (False, f"{null_test} AND i.id {op} ?", [key_id])
+            if not ascending:
+                return [nulls] # Only NULLs come after a NULL going down
+        elif key_id:
+            ties = (True, f"{expr} = ? AND i.id {op} ?", [key_value, key_id])
+            values = (True, f"{expr} {op} ?", [key_value])
+            return [ties, values] if ascending else [ties, values, nulls]
+        return [nulls, values] if ascending else [values, nulls]
+
+    @contextmanager
+    def transaction(self):
+        """Run several statements as one write transaction on the calling thread's connection
+
+        Yields the connection; commits at the end, or rolls back if an exception escapes.
+        """
+        conn = self.get_connection()
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN IMMEDIATE") # Take the write lock up front
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    @contextmanager
+    def bulk_load(self):
+        """Run a large item load in one transaction on the calling thread's connection
+
+        Item indexes and per-row insert triggers are dropped for the duration and rebuilt
+        once at the end, together with the full-text entries, stats and opening stock
+        movements for the new rows, which are logged as one bulk_insert change.
+        Yields the connection; any exception rolls the whole load back.
+        """
+        with self.transaction() as conn:
+            max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM items").fetchone()[0]
+            for name in self.ITEM_INDEXES:
+                conn.execute(f"DROP INDEX IF EXISTS {name}")
+            for name in self.ITEM_INSERT_TRIGGERS:
+                conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+            yield conn
+
+            for index_sql in self.ITEM_INDEXES.values():
+                conn.execute(index_sql)
+            for trigger_sql in self.ITEM_INSERT_TRIGGERS.values():
+                conn.execute(trigger_sql)
+            conn.execute(self.FTS_BACKFILL, (max_id,))
+            conn.execute(self.STATS_RECOUNT)
+            conn.execute("INSERT INTO change_log (table_name, row_id, op) VALUES ('items', ?, 'bulk_insert')",
+                         (max_id,))
+            conn.execute('''INSERT INTO stock_movements (item_id, delta, quantity_after, reason, created_at)
+                SELECT id, quantity, quantity, 'Imported', ? FROM items WHERE id > ? AND quantity != 0''',
+                         (self.timestamp(), max_id))
+
+    def get_dashboard_stats(self):
+        """Return the dashboard counters and the ten lowest-stock items as a dict
+
+        Counters come from the trigger-maintained inventory_stats row and the lowest ten
+        from idx_items_quantity, so the cost does not grow with the catalog. The result is
+        cached per connection until this or another connection writes to the database.
+        """
+        conn = self.get_connection()
+        # data_version moves when other connections commit, total_changes when this one writes
+        version = (conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes)
+        cached = getattr(self._local, "stats_cache", None)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        counters = conn.execute(
+            "SELECT total_items, low_stock_items, total_categories FROM inventory_stats WHERE id = 1").fetchone()
+        lowest = conn.execute("SELECT name, quantity FROM items ORDER BY quantity ASC LIMIT 10").fetchall()
+        stats = {
+            "total_items": counters['total_items'],
+            "low_stock_items": counters['low_stock_items'],
+            "total_categories": counters['total_categories'],
+            "lowest_stock": [(row['name'], row['quantity']) for row in lowest],
+        }
+        self._local.stats_cache = (version, stats)
+        return stats
+
+    def data_version(self):
+        """Return PRAGMA data_version of the calling thread's connection; it moves when another connection commits"""
+        return self.get_connection().execute("PRAGMA data_version").fetchone()[0]
+
+    def change_log_position(self):
+        """Return the id of the newest change_log entry, the starting point for changes_since"""
+        return self.execute_query("SELECT COALESCE(MAX(id), 0) FROM change_log", fetch=True)[0][0]
+
+    def changes_since(self, position):
+        """Return (new position, [(table_name, row_id, op)]) for the change_log entries after position
+
+        The list is None if entries after position were already trimmed from the log, in
+        which case everything should be reloaded.
+        """
+        rows = self.execute_query("SELECT id, table_name, row_id, op FROM change_log WHERE id > ? ORDER BY id",
+                                  (position,), fetch=True)
+        if not rows:
+            return position, []
+        if rows[0]['id'] != position + 1: # Entry ids have no gaps until the oldest are trimmed
+            return rows[-1]['id'], None
+        return rows[-1]['id'], [(row['table_name'], row['row_id'], row['op']) for row in rows]
+
+    def get_item(self, item_id):
+        """Return one joined item row, or None if it does not exist"""
+        rows = self.fetch_items(item_id=item_id)
+        return rows[0] if rows else None
+
+    @staticmethod
+    def timestamp():
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def insert_item(self, name, category_id, quantity, price, min_stock, supplier):
+        """Insert an item, recording its opening stock as a movement, and return its joined row"""
+        now = self.timestamp()
+        with self.transaction() as conn:
+            cursor = conn.execute("""
+                INSERT INTO items (name, category_id, quantity, price, min_stock, supplier, date_added)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (
+                name,
+                category_id or None, # Store None if no category is chosen
+                quantity,
+                price,
+                min_stock,
+                supplier,
+                now
+            ))
+            if quantity:
+                self._record_movement(conn, cursor.lastrowid, quantity, quantity, "Initial stock", now)
+        return self.get_item(cursor.lastrowid)
+
+    def update_item(self, item_id, name, category_id, quantity, price, min_stock, supplier, delta=0,
+                    reason="Manual adjustment"):
+        """Update an item and return its joined row, or None if it no longer exists
+
+        quantity=None leaves the stock as it is; prefer adjust_stock for stock changes. A
+        quantity is applied as an absolute correction and recorded with the difference.
+        A non-zero delta is applied as a relative adjustment, as by adjust_stock, in the
+        same transaction as the field update, so either both are committed or neither is.
+        """
+        with self.transaction() as conn:
+            if delta:
+                self._apply_movement(conn, item_id, delta, reason, self.timestamp())
+            if quantity is not None:
+                row = conn.execute("SELECT COALESCE(quantity, 0) FROM items WHERE id=?", (item_id,)).fetchone()
+                if row is not None and row[0] != quantity:
+                    self._record_movement(conn, item_id, quantity - row[0], quantity, "Stock correction",
+                                          self.timestamp())
+            conn.execute("""
+                UPDATE items SET name=?, category_id=?, quantity=COALESCE(?, quantity), price=?, min_stock=?,
+                    supplier=?
+                WHERE id=?
+            """, (name, category_id or None, quantity, price, min_stock, supplier, item_id))
+        return self.get_item(item_id)
+
+    @staticmethod
+    def _record_movement(conn, item_id, delta, quantity_after, reason, now):
+        conn.execute("""
+            INSERT INTO stock_movements (item_id, delta, quantity_after, reason, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (item_id, delta, quantity_after, reason, now))
+
+    def _apply_movement(self, conn, item_id, delta, reason, now):
+        """Add delta to an item's stock inside the caller's transaction; returns the new quantity"""
+        if not isinstance(delta, int) or isinstance(delta, bool) or delta == 0:
+            raise ValueError(f"Stock change for item {item_id} must be a non-zero whole number")
+        if not reason or not reason.strip():
+            raise ValueError("A reason is required for every stock movement")
+        # Relative update, so concurrent adjustments add up instead of overwriting each other
+        cursor = conn.execute("""
+            UPDATE items SET quantity = COALESCE(quantity, 0) + ?
+            WHERE id = ? AND COALESCE(quantity, 0) + ? >= 0
+        """, (delta, item_id, delta))
+        row = conn.execute("SELECT COALESCE(quantity, 0) FROM items WHERE id = ?", (item_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Item {item_id} does not exist")
+        if cursor.rowcount == 0:
+            raise ValueError(f"Not enough stock for item {item_id}: {row[0]} available, {-delta} requested")
+        self._record_movement(conn, item_id, delta, row[0], reason.strip(), now)
+        return row[0]
+
+    def adjust_stock(self, item_id, delta, reason):
+        """Atomically add delta (negative to remove) to an item's stock and record the movement
+
+        Returns the new quantity. Raises ValueError if the item does not exist or its
+        stock would drop below zero, in which case nothing is changed.
+        """
+        with self.transaction() as conn:
+            return self._apply_movement(conn, item_id, delta, reason, self.timestamp())
+
+    def apply_stock_movements(self, movements, reason):
+        """Apply [(item_id, delta)] in one transaction; returns {item_id: new quantity}
+
+        Either every movement is applied or, if any of them fails, none is.
+        """
+        now = self.timestamp()
+        quantities = {}
+        with self.transaction() as conn:
+            for item_id, delta in movements:
+                quantities[item_id] = self._apply_movement(conn, item_id, delta, reason, now)
+        return quantities
+
+    def receive_stock(self, lines, reason="Received"):
+        """Add stock for [(item_id, quantity)] lines, e.g. a delivery, in one transaction"""
+        return self.apply_stock_movements(self._batch_lines(lines, 1), reason)
+
+    def ship_stock(self, lines, reason="Shipped"):
+        """Remove stock for [(item_id, quantity)] lines, e.g. an order, in one transaction"""
+        return self.apply_stock_movements(self._batch_lines(lines, -1), reason)
+
+    @staticmethod
+    def _batch_lines(lines, sign):
+        movements = []
+        for item_id, quantity in lines:
+            if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity <= 0:
+                raise ValueError(f"Quantity for item {item_id} must be a positive whole number")
+            movements.append((item_id, sign * quantity))
+        return movements
+
+    def get_stock_movements(self, item_id=None, since=None, limit=100):
+        """Return movements newest first, optionally for one item and from a 'YYYY-MM-DD ...' time on"""
+        conditions = []
+        params = []
+        if item_id is not None:
+            conditions.append("item_id = ?")
+            params.append(item_id)
+        if since is not None:
+            conditions.append("created_at >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        params.append(limit)
+        return self.execute_query(f"""
+            SELECT id, item_id, delta, quantity_after, reason, created_at FROM stock_movements
+            {where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        """, params, fetch=True)
+
+    def delete_item(self, item_id):
+        """Delete an item and return the row it had, or None if it did not exist"""
+        row = self.get_item(item_id)
+        self.execute("DELETE FROM items WHERE id=?", (item_id,))
+        return row
+
+    def add_category(self, name, description=""):
+        """Insert a category and return its id; raises sqlite3.IntegrityError if the name is taken"""
+        try:
+            return self.execute("INSERT INTO categories (name, description) VALUES (?, ?)", (name, description)).lastrowid
+        finally:
+            self.categories.invalidate()
+
+    def update_category(self, category_id, name, description):
+        """Rename a category or change its description"""
+        try:
+            self.execute("UPDATE categories SET name=?, description=? WHERE id=?", (name, description, category_id))
+        finally:
+            self.categories.invalidate()
+
+    def delete_category(self, category_id):
+        """Delete a category; ON DELETE SET NULL makes its items uncategorized"""
+        try:
+            self.execute("DELETE FROM categories WHERE id = ?", (category_id,))
+        finally:
+            self.categories.invalidate()
+
+    def profile(self, name):
+        """Context manager timing its body as operation name when profiling is on"""
+        profiler = self.profiler
+        return profiler.operation(name) if profiler is not None else nullcontext()
+
+    def _record_query(self, profiler, query, params, start, rows):
+        seconds = time.perf_counter() - start
+        plan = None
+        if profiler.is_slow(seconds):
+            try:
+                plan = [row['detail'] for row in self.get_connection().execute("EXPLAIN QUERY PLAN " + query, params)]
+            except sqlite3.Error: # Not explainable, e.g. a PRAGMA
+                pass
+        profiler.record_query(query, seconds, max(rows, 0), params, plan)
+
+    def execute_query(self, query, params=(), fetch=False):
+        profiler = self.profiler # Read once; the GUI can switch profiling while jobs run
+        if profiler is None:
+            cursor = self._execute(query, params)
+            return cursor.fetchall() if fetch else None
+        start = time.perf_counter()
+        cursor = self._execute(query, params)
+        rows = cursor.fetchall() if fetch else None
+        self._record_query(profiler, query, params, start, len(rows) if fetch else cursor.rowcount)
+        return rows
+
+    def execute(self, query, params=()):
+        """Run one statement, committing if it wrote, and return its cursor"""
+        profiler = self.profiler
+        if profiler is None:
+            return self._execute(query, params)
+        start = time.perf_counter()
+        cursor = self._execute(query, params)
+        # Rows of a SELECT are only known once the caller has fetched them
+        self._record_query(profiler, query, params, start, cursor.rowcount)
+        return cursor
+
+    def _execute(self, query, params=()):
+        conn = self.get_connection()
+        try:
+            cursor = conn.execute(query, params)
+            if conn.in_transaction: # Only writes open a transaction, so reads never pay for a commit
+                conn.commit()
+            return cursor
+        except sqlite3.IntegrityError as e:
+            # Catch specific integrity errors like UNIQUE constraint violations
+            print(f"Database Integrity Error: {e}", file=sys.stderr) # Not stdout, which the CLI pipes reports to
+            conn.rollback()
+            raise # Re-raise the exception so it can be caught by the calling UI function
+        except Exception as e:
+            # Catch other general database errors
+            print(f"Database error: {e}", file=sys.stderr)
+            if conn.in_transaction:
+                conn.rollback()
+            raise # Re-raise other exceptions as well
@@ -0,0 +1,141 @@
+"""Streaming inventory exports
+
+Rows are read from the database cursor in fixed-size batches and written out
+incrementally, so peak memory stays bounded whatever the size of the catalog.
+"""
+import csv
+import os
+from contextlib import contextmanager
+
+import inventory_pdf
+
+EXPORT_COLUMNS = ['Item Name', 'Category', 'Quantity', 'Price', 'Min Stock', 'Supplier', 'Date Added']
+EXPORT_QUERY = """
+    SELECT i.name, COALESCE(c.name, 'N/A') AS category_name, i.quantity, i.price, i.min_stock,
+           i.supplier, i.date_added
+    FROM items i LEFT JOIN categories c ON i.category_id = c.id
+    ORDER BY i.id
+"""
+BATCH_SIZE = 1000
+
+
+@contextmanager
+def read_snapshot(db_manager):
+    """Hold one read transaction on the calling thread's connection and yield the connection
+
+    Queries run on the yielded connection all see the database as of the first of them,
+    whatever other connections commit meanwhile. Statements run through db_manager itself
+    would end the transaction, so pass the connection on, e.g. iter_batches(..., conn=conn).
+    """
+    conn = db_manager.get_connection()
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN") # Deferred: the snapshot is taken by the first read
+    try:
+        yield conn
+    finally:
+        conn.rollback() # Nothing was written; just ends the read transaction
+
+
+def iter_batches(db_manager, query, batch_size=BATCH_SIZE, progress=None, total=None, conn=None):
+    """Yield lists of at most batch_size row tuples from query
+
+    progress, if given, is called as progress(rows_done, total) before each batch, total
+    defaulting to the item count; a background job's callback raises from there to cancel.
+    conn, e.g. from read_snapshot(), runs the query on that connection instead.
+    """
+    if progress and total is None:
+        total = db_manager.get_dashboard_stats()['total_items']
+    done = 0
+    cursor = conn.execute(query) if conn is not None else db_manager.execute(query)
+    try:
+        while True:
+            if progress:
+                progress(done, total)
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            done += len(rows)
+            yield [tuple(row) for row in rows]
+    finally:
+        cursor.close()
+
+
+def iter_export_batches(db_manager, batch_size=BATCH_SIZE, progress=None):
+    """Yield lists of at most batch_size row tuples in EXPORT_COLUMNS order"""
+    return iter_batches(db_manager, EXPORT_QUERY, batch_size, progress)
+
+
+def export_xlsx(db_manager, filename, batch_size=BATCH_SIZE, progress=None):
+    """Write the inventory to an .xlsx file using openpyxl's write-only mode; returns the row count"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True) # Rows are streamed to disk instead of kept as cell objects
+    sheet = workbook.create_sheet("Sheet1")
+    sheet.append(EXPORT_COLUMNS)
+    count = 0
+    try:
+        for batch in iter_export_batches(db_manager, batch_size, progress):
+            for row in batch:
+                sheet.append(row)
+            count += len(batch)
+    except BaseException:
+        sheet.close() # Finish the temporary sheet file so it can be cleaned up
+        raise
+    workbook.save(filename)
+    return count
+
+
+def export_csv(db_manager, filename, batch_size=BATCH_SIZE, progress=None):
+    """Write the inventory to a UTF-8 CSV file; returns the row count"""
+    count = 0
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_COLUMNS)
+        for batch in iter_export_batches(db_manager, batch_size, progress):
+            writer.writerows(batch)
+            count += len(batch)
+    return count
+
+
+def export_parquet(db_manager, filename, batch_size=BATCH_SIZE, progress=None):
+    """Write the inventory to a Parquet file, one row group per batch; returns the row count"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export requires pyarrow (pip install pyarrow)") from None
+
+    schema = pa.schema([
+        ('Item Name', pa.string()), ('Category', pa.string()), ('Quantity', pa.int64()),
+        ('Price', pa.float64()), ('Min Stock', pa.int64()), ('Supplier', pa.string()),
+        ('Date Added', pa.string()),
+    ])
+    count = 0
+    with pq.ParquetWriter(filename, schema) as writer:
+        for batch in iter_export_batches(db_manager, batch_size, progress):
+            columns = [list(column) for column in zip(*batch)]
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema))
+            count += len(batch)
+    return count
+
+
+# Export format name -> (writer function, file extension)
+EXPORT_FORMATS = {
+    "xlsx": (export_xlsx, ".xlsx"),
+    "csv": (export_csv, ".csv"),
+    "parquet": (export_parquet, ".parquet"),
+    "pdf": (inventory_pdf.export_pdf, ".pdf"),
+}
+
+
+def write_export(db_manager, export_format, filename, progress=None):
+    """Export to filename in one of EXPORT_FORMATS, removing the file if the export fails; returns the row count"""
+    writer, _ = EXPORT_FORMATS[export_format]
+    try:
+        return writer(db_manager, filename, progress=progress)
+    except BaseException:
+        if os.path.exists(filename):
+            os.remove(filename) # Don't leave a truncated file behind
+        raise
@@ -0,0 +1,247 @@
+"""Bulk item import from CSV and Excel files
+
+Input rows are streamed from the file, validated, and inserted with executemany
+in batches inside one bulk-load transaction, with item indexes and per-row
+triggers deferred until the load finishes. Category names are resolved to ids
+through an in-memory dict, creating categories that do not exist yet. Rows that
+fail validation are collected with their line number and reason instead of
+aborting the import. Files written by the Excel and CSV exports import as-is.
+"""
+import csv
+import math
+import os
+from datetime import datetime
+
+BATCH_SIZE = 5000
+MAX_REPORTED_REJECTS = 1000 # Rejected rows kept on the result; the rejects file gets all of them
+MAX_INTEGER = 2 ** 63 - 1    # Largest quantity SQLite can store
+
+# Accepted header spellings (lower-cased, spaces and dashes as underscores) -> item field
+HEADER_ALIASES = {
+    "name": "name", "item": "name", "item_name": "name",
+    "category": "category", "category_name": "category",
+    "quantity": "quantity", "qty": "quantity",
+    "price": "price", "unit_price": "price",
+    "min_stock": "min_stock", "minimum_stock": "min_stock",
+    "supplier": "supplier",
+    "date_added": "date_added",
+}
+NO_CATEGORY = {"", "n/a"} # Category cells meaning "no category"
+
+INSERT_ITEM = '''INSERT INTO items (name, category_id, quantity, price, min_stock, supplier, date_added)
+    VALUES (?, ?, ?, ?, ?, ?, ?)'''
+
+REJECT_COLUMNS = ["Line", "Reason", "Name", "Category", "Quantity", "Price", "Min Stock", "Supplier"]
+REJECT_FIELDS = ("name", "category", "quantity", "price", "min_stock", "supplier")
+
+
+class ImportResult:
+    """Outcome of an import: counts plus the first rejected rows as (line, reason, values)"""
+
+    def __init__(self, rejects_file=None):
+        self.imported = 0
+        self.rejected = 0
+        self.rejects = []
+        self.categories_created = 0
+        self.rejects_file = rejects_file
+        self._rejects_out = None
+        self._rejects_writer = None
+
+    def reject(self, line, reason, values):
+        """Record a rejected row, appending it to the rejects file if one was requested"""
+        self.rejected += 1
+        if len(self.rejects) < MAX_REPORTED_REJECTS:
+            self.rejects.append((line, reason, values))
+        if self.rejects_file:
+            if self._rejects_writer is None: # Only create the file once there is something to write
+                self._rejects_out = open(self.rejects_file, "w", newline="", encoding="utf-8")
+                self._rejects_writer = csv.writer(self._rejects_out)
+                self._rejects_writer.writerow(REJECT_COLUMNS)
+            self._rejects_writer.writerow([line, reason] + [values.get(field, "") for field in REJECT_FIELDS])
+
+    def close(self):
+        if self._rejects_out:
+            self._rejects_out.close()
+        elif self.rejects_file:
+            self.rejects_file = None # Nothing was rejected, so no file was written
+
+    def summary(self):
+        text = f"Imported {self.imported} items, rejected {self.rejected} rows."
+        if self.categories_created:
+            text += f"\nCreated {self.categories_created} new categories."
+        if self.rejects_file:
+            text += f"\nRejected rows were written to {self.rejects_file}"
+        return text
+
+
+def _normalize_header(header):
+    return str(header or "").strip().lower().replace(" ", "_").replace("-", "_")
+
+
+def _iter_csv(filename):
+    """Yield (line number, header, row values) from a CSV file"""
+    with open(filename, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        for row in reader:
+            yield reader.line_num, header, row
+
+
+def _iter_xlsx(filename):
+    """Yield (line number, header, row values) from the first sheet of an .xlsx file"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(filename, read_only=True, data_only=True) # Streams rows from the zip
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        for line, row in enumerate(rows, start=2):
+            yield line, header, row
+    finally:
+        workbook.close()
+
+
+def count_rows(filename):
+    """Return the number of data rows in filename, for progress reporting"""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == ".csv":
+        with open(filename, "rb") as f:
+            return max(sum(1 for _ in f) - 1, 0)
+    if ext not in (".xlsx", ".xlsm"):
+        return 0 # iter_rows rejects the file
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(filename, read_only=True)
+    try:
+        return max((workbook.worksheets[0].max_row or 1) - 1, 0)
+    finally:
+        workbook.close()
+
+
+def iter_rows(filename):
+    """Yield (line number, {field: value}) for every non-empty row of a CSV or .xlsx file"""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == ".csv":
+        source = _iter_csv(filename)
+    elif ext in (".xlsx", ".xlsm"):
+        source = _iter_xlsx(filename)
+    else:
+        raise ValueError(f"Unsupported file type '{ext}'; use .csv or .xlsx")
+
+    fields = None
+    for line, header, row in source:
+        if fields is None:
+            fields = [HEADER_ALIASES.get(_normalize_header(h)) for h in header or ()]
+            if "name" not in fields:
+                raise ValueError("The first row must be a header with at least an item name column")
+        if not any(cell not in (None, "") for cell in row):
+            continue # Skip blank lines
+        yield line, {field: value for field, value in zip(fields, row) if field}
+
+
+def _parse_int(value, field):
+    if value is None or value == "":
+        return 0
+    try:
+        number = float(str(value).replace(",", "").strip())
+    except ValueError:
+        raise ValueError(f"{field} is not a number: {value!r}") from None
+    if not math.isfinite(number): # int() would raise OverflowError on inf and nan
+        raise ValueError(f"{field} is not a finite number: {value!r}")
+    if number != int(number) or number < 0 or number > MAX_INTEGER:
+        raise ValueError(f"{field} must be a whole number from 0 to {MAX_INTEGER}: {value!r}")
+    return int(number)
+
+
+def _parse_price(value):
+    if value is None or value == "":
+        return 0.0
+    try:
+        price = float(str(value).replace("$", "").replace(",", "").strip())
+    except ValueError:
+        raise ValueError(f"price is not a number: {value!r}") from None
+    if not math.isfinite(price): # inf and nan would break report totals and formatting
+        raise ValueError(f"price is not a finite number: {value!r}")
+    if price < 0:
+        raise ValueError(f"price must not be negative: {value!r}")
+    return price
+
+
+def _parse_date(value, now):
+    if value is None or value == "":
+        return now
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return str(value).strip()
+
+
+def parse_row(values, now):
+    """Validate one row; returns (name, quantity, price, min_stock, supplier, date_added) or raises ValueError"""
+    name = str(values.get("name") or "").strip()
+    if not name:
+        raise ValueError("item name is empty")
+    supplier = values.get("supplier")
+    return (name,
+            _parse_int(values.get("quantity"), "quantity"),
+            _parse_price(values.get("price")),
+            _parse_int(values.get("min_stock"), "min_stock"),
+            str(supplier).strip() if supplier is not None else "",
+            _parse_date(values.get("date_added"), now))
+
+
+def load_categories(conn):
+    """Return a dict of lower-cased category name -> id"""
+    return {name.lower(): category_id for category_id, name in conn.execute("SELECT id, name FROM categories")}
+
+
+def _resolve_category(conn, categories, value, result):
+    name = str(value or "").strip()
+    if name.lower() in NO_CATEGORY:
+        return None
+    category_id = categories.get(name.lower())
+    if category_id is None:
+        category_id = conn.execute("INSERT INTO categories (name) VALUES (?)", (name,)).lastrowid
+        categories[name.lower()] = category_id
+        result.categories_created += 1
+    return category_id
+
+
+def import_items(db_manager, filename, batch_size=BATCH_SIZE, progress=None, rejects_file=None):
+    """Import items from a CSV or .xlsx file; returns an ImportResult
+
+    The whole file is loaded in one transaction, so an error or cancellation
+    raised from progress(rows_done, total) leaves the database unchanged.
+    Rejected rows are also written to rejects_file as CSV when it is given.
+    """
+    total = count_rows(filename) if progress else 0
+    result = ImportResult(rejects_file)
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    done = 0
+    batch = []
+
+    try:
+        with db_manager.bulk_load() as conn:
+            categories = load_categories(conn)
+            for line, values in iter_rows(filename):
+                if progress and done % batch_size == 0:
+                    progress(done, total)
+                done += 1
+                try:
+                    name, *fields = parse_row(values, now)
+                except ValueError as e:
+                    result.reject(line, str(e), values)
+                    continue
+                category_id = _resolve_category(conn, categories, values.get("category"), result)
+                batch.append((name, category_id, *fields))
+                if len(batch) >= batch_size:
+                    conn.executemany(INSERT_ITEM, batch)
+                    result.imported += len(batch)
+                    batch = []
+            if batch:
+                conn.executemany(INSERT_ITEM, batch)
+                result.imported += len(batch)
+    finally:
+        result.close()
+        if result.categories_created:
+            db_manager.categories.invalidate() # Also after a rollback, which drops the new categories again
+    return result
@@ -1,79 +1,28 @@
 #low item stocks appear in pink color
+import os
 import sys
 import sqlite3
 import hashlib
-from datetime import datetime, timedelta
-import pandas as pd
+import threading
+import time
+from bisect import bisect_left
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QTabWidget, QLabel, QLineEdit, QPushButton, QDialog, QMessageBox,
-    QFormLayout, QComboBox, QSpinBox, QDoubleSpinBox, QTableWidget,
-    QTableWidgetItem, QAbstractItemView, QGroupBox, QListWidget,
-    QListWidgetItem, QTextEdit, QAction, QFileDialog
+    QFormLayout, QComboBox, QSpinBox, QDoubleSpinBox, QTableView,
+    QAbstractItemView, QGroupBox, QListView,
+    QTextEdit, QPlainTextEdit, QAction, QFileDialog, QProgressBar, QCheckBox
 )
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QColor, QFont # QIcon removed as it was causing warnings without resource file
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-
-# Database Manager
-class DatabaseManager:
-    def __init__(self, db_name="inventory.db"):
-        self.db_name = db_name
-        self.init_database()
-
-    def init_database(self):
-        """Initialize database with required tables"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-
-        # Users table
-        cursor.execute('''CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY, username TEXT UNIQUE, password TEXT, role TEXT)''')
-
-        # Categories table
-        cursor.execute('''CREATE TABLE IF NOT EXISTS categories (
-            id INTEGER PRIMARY KEY, name TEXT UNIQUE, description TEXT)''')
-
-        # Items table with ON DELETE SET NULL for category_id
-        # This means if a category is deleted, items previously in that category will have category_id set to NULL.
-        cursor.execute('''CREATE TABLE IF NOT EXISTS items (
-            id INTEGER PRIMARY KEY, name TEXT, category_id INTEGER, quantity INTEGER,
-            price REAL, min_stock INTEGER, supplier TEXT, date_added TEXT,
-            FOREIGN KEY (category_id) REFERENCES categories (id) ON DELETE SET NULL)''')
-
-        # Add default admin user
-        # Check if admin already exists to prevent integrity errors on subsequent runs
-        cursor.execute("INSERT OR IGNORE INTO users (username, password, role) VALUES ('admin', ?, 'admin')",
-                       (hashlib.sha256('admin'.encode()).hexdigest(),))
-
-        conn.commit()
-        conn.close()
-
-    def execute_query(self, query, params=(), fetch=False):
-        conn = None
-        try:
-            conn = sqlite3.connect(self.db_name)
-            conn.row_factory = sqlite3.Row # Allows accessing columns by name
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            result = cursor.fetchall() if fetch else None
-            conn.commit()
-            return result
-        except sqlite3.IntegrityError as e:
-            # Catch specific integrity errors like UNIQUE constraint violations
-            print(f"Database Integrity Error: {e}")
-            raise # Re-raise the exception so it can be caught by the calling UI function
-        except Exception as e:
-            # Catch other general database errors
-            print(f"Database error: {e}")
-            raise # Re-raise other exceptions as well
-        finally:
-            if conn:
-                conn.close()
+from PyQt5.QtCore import (
+    Qt, QAbstractTableModel, QIdentityProxyModel, QModelIndex, QObject, QRunnable, QSortFilterProxyModel,
+    QThreadPool, QTimer, pyqtSignal
+)
+from PyQt5.QtGui import QBrush, QColor, QFont, QStandardItem, QStandardItemModel # QIcon removed as it was causing warnings without resource file
+import inventory_export
+import inventory_import
+import inventory_reports
+from inventory_db import DatabaseManager, ItemRecord
+from inventory_profiling import Profiler
 
 # Modern Styled Widget Base
 class StyledWidget(QWidget):
@@ -81,20 +30,20 @@ class StyledWidget(QWidget):
         super().__init__()
         self.setStyleSheet("""
             QWidget { background-color: #f5f5f5; font-family: 'Segoe UI'; }
-            QLineEdit, QComboBox, QSpinBox, QDoubleSpinBox, QTextEdit {
+            QLineEdit, QComboBox, QSpinBox, QDoubleSpinBox, QTextEdit, QPlainTextEdit {
                 padding: 8px; border: 2px solid #ddd; border-radius: 5px;
                 background-color: white; font-size: 14px; }
-            QLineEdit:focus, QComboBox:focus, QTextEdit:focus { border-color: #4CAF50; }
+            QLineEdit:focus, QComboBox:focus, QTextEdit:focus, QPlainTextEdit:focus { border-color: #4CAF50; }
             QPushButton {
                 padding: 10px 20px; background-color: #4CAF50; color: white;
                 border: none; border-radius: 5px; font-size: 14px; font-weight: bold; }
             QPushButton:hover { background-color: #45a049; }
             QPushButton:pressed { background-color: #3d8b40; }
-            QTableWidget {
+            QTableView {
                 gridline-color: #ddd; background-color: white;
                 alternate-background-color: #f9f9f9; }
-            QTableWidget::item { padding: 8px; }
-            QTableWidget::item:selected { background-color: #4CAF50; color: white; }
+            QTableView::item { padding: 8px; }
+            QTableView::item:selected { background-color: #4CAF50; color: white; }
             QHeaderView::section {
                 background-color: #2196F3; color: white; padding: 10px;
                 font-weight: bold; border: none; }
@@ -105,13 +54,13 @@ class StyledWidget(QWidget):
             QGroupBox {
                 font-weight: bold; border: 2px solid #ddd; border-radius: 5px;
                 margin: 10px; padding-top: 10px; }
-            QListWidget {
+            QListView {
                 border: 2px solid #ddd; border-radius: 5px; background-color: white;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 5px;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #4CAF50; color: white;
             }
         """)
@@ -172,40 +121,357 @@ class LoginDialog(QDialog, StyledWidget):
             QMessageBox.critical(self, "Login Error", f"An error occurred during login: {e}")
 
 
-# Chart Widget
-class ChartWidget(FigureCanvas):
+# Chart placeholder
+class LazyChartWidget(QWidget):
+    """Stands in for the dashboard chart and creates it the first time it is shown"""
+
     def __init__(self, parent=None):
-        self.figure = Figure(figsize=(8, 6), facecolor='white')
-        super().__init__(self.figure)
-        self.setParent(parent)
+        super().__init__(parent)
+        self.chart = None
+        self._pending_data = None # Latest data plotted before the chart existed
+
+        self.loading_label = QLabel("Loading chart...")
+        self.loading_label.setAlignment(Qt.AlignCenter)
+        self.loading_label.setStyleSheet("color: gray; font-size: 14px;")
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.loading_label)
+        self.setLayout(layout)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.chart is None:
+            QTimer.singleShot(0, self.create_chart) # Let the window paint before matplotlib is imported
+
+    def create_chart(self):
+        if self.chart is not None:
+            return
+        from inventory_chart import ChartWidget # Loads matplotlib and its Qt backend
+
+        self.chart = ChartWidget(self)
+        self.layout().replaceWidget(self.loading_label, self.chart)
+        self.loading_label.deleteLater()
+        if self._pending_data is not None:
+            self.chart.plot_stock_levels(self._pending_data)
+            self._pending_data = None
 
     def plot_stock_levels(self, data):
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-
-        if data:
-            items, quantities = zip(*data)
-            colors = ['red' if q <= 0 else 'orange' if q < 10 else 'green' for q in quantities] # Improved color logic
-            ax.bar(range(len(items)), quantities, color=colors)
-            ax.set_xticks(range(len(items)))
-            ax.set_xticklabels(items, rotation=45, ha='right')
-            ax.set_ylabel('Quantity')
-            ax.set_title('Top 10 Item Stock Levels')
-            ax.grid(axis='y', linestyle='--', alpha=0.7) # Add grid for better readability
+        if self.chart is None:
+            self._pending_data = data
         else:
-            ax.text(0.5, 0.5, "No item data available for chart.",
-                    horizontalalignment='center', verticalalignment='center',
-                    transform=ax.transAxes, fontsize=12, color='gray')
+            self.chart.plot_stock_levels(data)
+
+# Items Table Model
+class ItemsTableModel(QAbstractTableModel):
+    """Read-only items model showing one page of rows at a time
+
+    Pages are fetched by keyset on the sort column, so stepping to the next or previous page
+    costs the same however deep into the catalog it is. Ranked search results page by offset.
+    Clicking a header re-queries sorted on that column's typed database values.
+    Each loaded row is kept as an ItemRecord, which the item form reads, with an item id -> row index.
+    """
+    HEADERS = ["ID", "Name", "Category", "Quantity", "Price", "Min Stock", "Supplier", "Date Added"]
+    SORT_KEYS = ["id", "name", "category", "quantity", "price", "min_stock", "supplier", "date_added"]
+    PAGE_SIZES = [50, 100, 250, 500, 1000]
+    LOW_STOCK_BRUSH = QBrush(QColor(255, 220, 220)) # Lighter red highlight
+
+    pageChanged = pyqtSignal()
+
+    def __init__(self, db_manager, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.search = ""
+        self.category_id = None
+        self.low_stock = False
+        self.page_size = 100
+        self.sort_column = "id" # A DatabaseManager.SORT_COLUMNS key
+        self.descending = False
+        self.page = 1
+        self.has_next = False
+        self._clear()
+
+    def _clear(self):
+        self._records = []     # ItemRecord of each row, in page order
+        self._rows = {}        # item id -> row of the loaded rows
+        self._sort_values = [] # Raw database value of the sort column, the keyset for the next page
+
+    def set_filters(self, search, category_id, low_stock=False):
+        """Re-query with a new full-text search, category filter and low-stock-only flag"""
+        self.search = search
+        self.category_id = category_id
+        self.low_stock = low_stock
+        self.reload()
+
+    def _ranked(self):
+        """True when the search has words to match, so fetch_items ranks and pages by offset"""
+        return bool(DatabaseManager.build_search_query(self.search))
+
+    def set_page_size(self, page_size):
+        """Change the number of rows per page and go back to the first page"""
+        self.page_size = page_size
+        self.reload()
+
+    def _set_row(self, row, item_data, insert=False):
+        record = ItemRecord.from_row(item_data)
+        sort_value = item_data['category_name' if self.sort_column == "category" else self.sort_column]
+        if insert:
+            self._records.insert(row, record)
+            self._sort_values.insert(row, sort_value)
+            self._renumber(row)
+        else:
+            self._records[row] = record
+            self._sort_values[row] = sort_value
+            self._rows[record.id] = row
+
+    def _remove_row(self, row):
+        del self._rows[self._records.pop(row).id]
+        del self._sort_values[row]
+        self._renumber(row)
+
+    def _renumber(self, start):
+        # Rows from start on moved; appending while a page loads only touches the new row
+        for row in range(start, len(self._records)):
+            self._rows[self._records[row].id] = row
+
+    def record(self, row):
+        """Return the ItemRecord shown in row"""
+        return self._records[row]
+
+    def row_of(self, item_id):
+        """Return the row holding item_id, or None if it is not loaded"""
+        return self._rows.get(item_id)
+
+    def refresh_item(self, item_id):
+        """Re-read one item and patch, insert or drop its row without reloading the rest"""
+        rows = self.db_manager.fetch_items(self.search, self.category_id, item_id=item_id, low_stock=self.low_stock)
+        row = self.row_of(item_id)
+
+        if not rows: # Deleted, or no longer matches the filters
+            if row is not None:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                self._remove_row(row)
+                self.endRemoveRows()
+            return
 
+        if row is not None:
+            self._set_row(row, rows[0])
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+            return
+
+        if self._ranked() or self.sort_column != "id":
+            return # Shows up on whichever page it sorts into when that page is loaded
+        # The page holds a contiguous id range; only insert ids that fall inside it
+        ids = [record.id for record in self._records]
+        row = bisect_left(ids, item_id)
+        if self.descending:
+            row = len(ids) - bisect_left(ids[::-1], item_id)
+        if (row == 0 and self.page > 1) or (row == len(ids) and self.has_next):
+            return # Belongs to a neighbouring page
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._set_row(row, rows[0], insert=True)
+        self.endInsertRows()
+
+    def update_category_name(self, category_id, category_name):
+        """Patch the category column of loaded rows after a category rename or delete"""
+        changed = [row for row, record in enumerate(self._records) if record.category_id == category_id]
+        for row in changed:
+            self._records[row].category_name = category_name
+            if category_name is None:
+                self._records[row].category_id = None
+        if changed:
+            self.dataChanged.emit(self.index(changed[0], 2), self.index(changed[-1], 2))
+
+    def reload(self):
+        """Go back to the first page"""
+        self.page = 1
+        self._load_page(self.db_manager.fetch_items(self.search, self.category_id, **self._page_query()))
+
+    def next_page(self):
+        if not self.has_next:
+            return
+        if self._ranked():
+            page_query = self._page_query(offset=self.page * self.page_size)
+        else:
+            page_query = self._page_query(after_id=self._records[-1].id, after_value=self._sort_value(-1))
+        self.page += 1
+        self._load_page(self.db_manager.fetch_items(self.search, self.category_id, **page_query))
 
-        self.figure.tight_layout()
-        self.draw()
+    def previous_page(self):
+        if self.page <= 1:
+            return
+        if self._ranked() or not self._records:
+            self.page -= 1
+            page_query = self._page_query(offset=(self.page - 1) * self.page_size)
+            self._load_page(self.db_manager.fetch_items(self.search, self.category_id, **page_query))
+            return
+        rows = self.db_manager.fetch_items(self.search, self.category_id, **self._page_query(
+            before_id=self._records[0].id, before_value=self._sort_value(0)))
+        if len(rows) <= self.page_size:
+            self.reload() # Reached the start; rows deleted meanwhile could leave this page short
+            return
+        self.page -= 1
+        self.has_next = True
+        self._show_rows(rows[1:]) # The extra row is from the page before
+
+    def _page_query(self, **kwargs):
+        # One row past the page tells whether there is another page without a COUNT
+        return dict(kwargs, sort=self.sort_column, descending=self.descending, low_stock=self.low_stock,
+                    limit=self.page_size + 1)
+
+    def _sort_value(self, row):
+        return self._sort_values[row]
+
+    def _load_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        self._show_rows(rows[:self.page_size])
+
+    def _show_rows(self, rows):
+        self.beginResetModel()
+        self._clear()
+        for row, item_data in enumerate(rows):
+            self._set_row(row, item_data, insert=True)
+        self.endResetModel()
+        self.pageChanged.emit()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Re-query sorted on a column; called by the view when a header is clicked"""
+        sort_column, descending = self.SORT_KEYS[column], order == Qt.DescendingOrder
+        if (sort_column, descending) == (self.sort_column, self.descending):
+            return
+        self.sort_column, self.descending = sort_column, descending
+        self.reload()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._records)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return str(section + 1)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        record, col = self._records[index.row()], index.column()
+
+        if role == Qt.DisplayRole:
+            if col == 0:
+                return str(record.id)
+            elif col == 1:
+                return record.name
+            elif col == 2:
+                return record.category_name or "N/A"
+            elif col == 3:
+                return str(record.quantity)
+            elif col == 4:
+                return f"${record.price:.2f}"
+            elif col == 5:
+                return str(record.min_stock)
+            elif col == 6:
+                return record.supplier
+            elif col == 7:
+                return record.date_added
+        elif role == Qt.BackgroundRole:
+            # Highlight low stock items; only evaluated for rows the view actually paints
+            if record.is_low_stock:
+                return self.LOW_STOCK_BRUSH
+        return None
+
+# Category Models
+def category_item(name, category_id):
+    """Row of the shared categories model; the id is stored under Qt.UserRole"""
+    item = QStandardItem(name)
+    item.setData(category_id, Qt.UserRole)
+    item.setEditable(False)
+    return item
+
+
+class CategoryPlaceholderProxy(QIdentityProxyModel):
+    """Shows the shared categories model in a combo box, with row 0 (id 0) labelled as placeholder"""
+
+    def __init__(self, placeholder, source, parent=None):
+        super().__init__(parent)
+        self.placeholder = placeholder
+        self.setSourceModel(source)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.row() == 0 and role in (Qt.DisplayRole, Qt.EditRole):
+            return self.placeholder
+        return super().data(index, role)
+
+
+class CategoryListProxy(QSortFilterProxyModel):
+    """The shared categories model without its id 0 placeholder row"""
+
+    def __init__(self, source, parent=None):
+        super().__init__(parent)
+        self.setSourceModel(source)
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return source_row > 0
+
+# Background Jobs
+class JobCancelled(Exception):
+    """Raised from a job's progress callback once the job has been cancelled"""
+
+
+class JobSignals(QObject):
+    progress = pyqtSignal(int, int) # done, total
+    finished = pyqtSignal(object)   # the job's return value
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    done = pyqtSignal()             # always emitted last
+
+
+class BackgroundJob(QRunnable):
+    """Runs func(db_manager, progress) on a thread pool thread and reports back through signals
+
+    The pool thread gets its own connection from DatabaseManager, closed when the job ends.
+    progress(done, total) forwards to the progress signal and raises JobCancelled after cancel().
+    Signals are emitted from the pool thread and delivered to UI slots through the event loop.
+    """
+    def __init__(self, func, db_manager):
+        super().__init__()
+        self.func = func
+        self.db_manager = db_manager
+        self.signals = JobSignals()
+        self._cancel_event = threading.Event()
+        self._last_progress = 0.0
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def progress(self, done, total):
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+        # Throttle to ~20 updates a second so the event loop is not flooded
+        now = time.monotonic()
+        if now - self._last_progress >= 0.05 or done >= total:
+            self._last_progress = now
+            self.signals.progress.emit(done, total)
+
+    def run(self):
+        try:
+            result = self.func(self.db_manager, self.progress)
+            self.signals.finished.emit(result)
+        except JobCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        finally:
+            self.db_manager.release_connection()
+            self.signals.done.emit()
 
 # Main Application
 class InventoryApp(QMainWindow, StyledWidget):
-    def __init__(self):
+    def __init__(self, db_name="inventory.db"):
         super().__init__()
-        self.db_manager = DatabaseManager()
+        self.db_manager = DatabaseManager(db_name)
         self.current_user_role = None
         self.setup_ui()
 
@@ -220,6 +486,13 @@ class InventoryApp(QMainWindow, StyledWidget):
         else:
             sys.exit()
 
+        # One categories model behind the item form, the category filter and the categories list.
+        # Row 0 is the "no category" placeholder (id 0); category_rows maps ids to model rows.
+        self.categories_model = QStandardItemModel(self)
+        self.categories_model.appendRow(category_item("", 0))
+        self.category_rows = {0: 0}
+        self.categories_version = None # CategoryCache version the model was built from
+
         # Central widget with tabs
         central_widget = QTabWidget()
         self.setCentralWidget(central_widget)
@@ -240,17 +513,40 @@ class InventoryApp(QMainWindow, StyledWidget):
         self.reports_widget = self.create_reports_tab()
         central_widget.addTab(self.reports_widget, "Reports")
 
+        # Diagnostics tab
+        self.diagnostics_widget = self.create_diagnostics_tab()
+        central_widget.addTab(self.diagnostics_widget, "Diagnostics")
+        central_widget.currentChanged.connect(lambda: self.update_diagnostics()) # Draw at once on switching to it
+
         # Toolbar
         self.create_toolbar()
 
-        # Status bar
+        # Status bar, with a progress indicator and cancel button for background jobs
+        self.thread_pool = QThreadPool(self)
+        self.active_job = None
+        self.job_progress = QProgressBar()
+        self.job_progress.setMaximumWidth(250)
+        self.job_progress.hide()
+        self.cancel_job_btn = QPushButton("Cancel")
+        self.cancel_job_btn.setStyleSheet("QPushButton { padding: 2px 10px; background-color: #f44336; }")
+        self.cancel_job_btn.clicked.connect(self.cancel_job)
+        self.cancel_job_btn.hide()
+        self.statusBar().addPermanentWidget(self.job_progress)
+        self.statusBar().addPermanentWidget(self.cancel_job_btn)
         self.statusBar().showMessage(f"Logged in as: {self.current_user_role.capitalize()}")
 
         # Load initial data
+        self.mark_changes_seen()
         self.load_categories() # Categories loaded first as items depend on them
         self.load_items()
         self.update_dashboard()
 
+        # Pick up edits made by other instances on the same database
+        self.change_timer = QTimer(self)
+        self.change_timer.setInterval(1000)
+        self.change_timer.timeout.connect(self.poll_changes)
+        self.change_timer.start()
+
     def create_toolbar(self):
         """Create application toolbar"""
         toolbar = self.addToolBar("Main")
@@ -258,16 +554,28 @@ class InventoryApp(QMainWindow, StyledWidget):
 
         # Refresh action - Icons removed to prevent warnings if not using .qrc
         refresh_action = QAction("Refresh", self)
-        refresh_action.triggered.connect(self.refresh_all_data)
+        refresh_action.triggered.connect(lambda: self.refresh_all_data(reload_categories=True))
         toolbar.addAction(refresh_action)
 
         toolbar.addSeparator()
 
+        import_action = QAction("Import", self)
+        import_action.triggered.connect(self.import_items)
+        toolbar.addAction(import_action)
+
         # Export actions - Icons removed
         export_excel_action = QAction("Export Excel", self)
         export_excel_action.triggered.connect(self.export_to_excel)
         toolbar.addAction(export_excel_action)
 
+        export_csv_action = QAction("Export CSV", self)
+        export_csv_action.triggered.connect(self.export_to_csv)
+        toolbar.addAction(export_csv_action)
+
+        export_parquet_action = QAction("Export Parquet", self)
+        export_parquet_action.triggered.connect(self.export_to_parquet)
+        toolbar.addAction(export_parquet_action)
+
         export_pdf_action = QAction("Export PDF", self)
         export_pdf_action.triggered.connect(self.export_to_pdf)
         toolbar.addAction(export_pdf_action)
@@ -287,26 +595,24 @@ class InventoryApp(QMainWindow, StyledWidget):
         # Stats cards
         stats_layout = QHBoxLayout()
 
+        stats = self.db_manager.get_dashboard_stats()
+
         # Total items card
-        total_items_count = self.db_manager.execute_query("SELECT COUNT(*) FROM items", fetch=True)[0][0]
-        self.total_items_card = self.create_stat_card("Total Items", str(total_items_count), "#2196F3", "totalItemsLabel")
+        self.total_items_card = self.create_stat_card("Total Items", str(stats['total_items']), "#2196F3", "totalItemsLabel")
         stats_layout.addWidget(self.total_items_card)
 
         # Low stock items
-        low_stock_count = self.db_manager.execute_query(
-            "SELECT COUNT(*) FROM items WHERE quantity <= min_stock", fetch=True)[0][0]
-        self.low_stock_card = self.create_stat_card("Low Stock", str(low_stock_count), "#f44336", "lowStockLabel")
+        self.low_stock_card = self.create_stat_card("Low Stock", str(stats['low_stock_items']), "#f44336", "lowStockLabel")
         stats_layout.addWidget(self.low_stock_card)
 
         # Total categories
-        total_categories_count = self.db_manager.execute_query("SELECT COUNT(*) FROM categories", fetch=True)[0][0]
-        self.categories_card = self.create_stat_card("Categories", str(total_categories_count), "#4CAF50", "categoriesLabel")
+        self.categories_card = self.create_stat_card("Categories", str(stats['total_categories']), "#4CAF50", "categoriesLabel")
         stats_layout.addWidget(self.categories_card)
 
         layout.addLayout(stats_layout)
 
-        # Chart
-        self.chart_widget = ChartWidget()
+        # Chart, created when the dashboard is first shown
+        self.chart_widget = LazyChartWidget()
         layout.addWidget(self.chart_widget)
 
         widget.setLayout(layout)
@@ -343,31 +649,62 @@ class InventoryApp(QMainWindow, StyledWidget):
         # Search and filter
         search_layout = QHBoxLayout()
         self.search_input = QLineEdit()
-        self.search_input.setPlaceholderText("Search items...")
-        self.search_input.textChanged.connect(self.filter_items)
+        self.search_input.setPlaceholderText("Search name, supplier or category...")
+        # Debounce typing so the query runs once the user pauses rather than on every keystroke
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.filter_items)
+        self.search_input.textChanged.connect(lambda: self.search_timer.start())
 
         self.category_filter = QComboBox()
-        self.category_filter.addItem("All Categories")
-        self.category_filter.currentTextChanged.connect(self.filter_items)
+        self.category_filter.setModel(CategoryPlaceholderProxy("All Categories", self.categories_model, self))
+        self.category_filter.currentIndexChanged.connect(self.filter_items)
+
+        self.low_stock_only = QCheckBox("Low stock only") # Served by the partial index on low-stock rows
+        self.low_stock_only.toggled.connect(self.filter_items)
 
         search_layout.addWidget(QLabel("Search:"))
         search_layout.addWidget(self.search_input)
         search_layout.addStretch() # Push category filter to the right
         search_layout.addWidget(QLabel("Category:"))
         search_layout.addWidget(self.category_filter)
+        search_layout.addWidget(self.low_stock_only)
 
         # Items table
-        self.items_table = QTableWidget()
-        self.items_table.setColumnCount(8)
-        self.items_table.setHorizontalHeaderLabels([
-            "ID", "Name", "Category", "Quantity", "Price", "Min Stock", "Supplier", "Date Added"
-        ])
+        self.items_model = ItemsTableModel(self.db_manager, self)
+        self.items_table = QTableView()
+        self.items_table.setModel(self.items_model)
         self.items_table.horizontalHeader().setStretchLastSection(True)
         self.items_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.items_table.setSelectionMode(QAbstractItemView.SingleSelection) # Allow only single row selection
         self.items_table.setEditTriggers(QAbstractItemView.NoEditTriggers) # Make table non-editable
         self.items_table.setAlternatingRowColors(True)
-        self.items_table.itemClicked.connect(self.load_item_details_to_form) # Load details on click
+        self.items_table.horizontalHeader().setSortIndicator(0, Qt.AscendingOrder) # Matches the model's id order
+        self.items_table.setSortingEnabled(True) # Header clicks call items_model.sort, which re-queries
+        self.items_table.clicked.connect(self.load_item_details_to_form) # Load details on click
+        self.items_model.pageChanged.connect(self.update_page_controls)
+
+        # Page navigation
+        page_layout = QHBoxLayout()
+        self.prev_page_btn = QPushButton("< Prev")
+        self.prev_page_btn.clicked.connect(self.items_model.previous_page)
+        self.next_page_btn = QPushButton("Next >")
+        self.next_page_btn.clicked.connect(self.items_model.next_page)
+        self.page_label = QLabel()
+        self.page_size_combo = QComboBox()
+        for page_size in ItemsTableModel.PAGE_SIZES:
+            self.page_size_combo.addItem(str(page_size), page_size)
+        self.page_size_combo.setCurrentIndex(ItemsTableModel.PAGE_SIZES.index(self.items_model.page_size))
+        self.page_size_combo.currentIndexChanged.connect(
+            lambda: self.items_model.set_page_size(self.page_size_combo.currentData()))
+
+        page_layout.addWidget(self.prev_page_btn)
+        page_layout.addWidget(self.page_label)
+        page_layout.addWidget(self.next_page_btn)
+        page_layout.addStretch()
+        page_layout.addWidget(QLabel("Rows per page:"))
+        page_layout.addWidget(self.page_size_combo)
 
         # Item form
         form_group = QGroupBox("Add/Edit Item")
@@ -375,6 +712,7 @@ class InventoryApp(QMainWindow, StyledWidget):
 
         self.item_name = QLineEdit()
         self.item_category = QComboBox()
+        self.item_category.setModel(CategoryPlaceholderProxy("Select Category", self.categories_model, self))
         self.item_quantity = QSpinBox()
         self.item_quantity.setRange(0, 999999)
         self.item_price = QDoubleSpinBox()
@@ -383,6 +721,7 @@ class InventoryApp(QMainWindow, StyledWidget):
         self.item_min_stock = QSpinBox()
         self.item_min_stock.setRange(0, 999999)
         self.item_supplier = QLineEdit()
+        self.loaded_quantity = None # Quantity of the item loaded into the form
 
         form_layout.addRow("Name:", self.item_name)
         form_layout.addRow("Category:", self.item_category)
@@ -413,6 +752,7 @@ class InventoryApp(QMainWindow, StyledWidget):
 
         layout.addLayout(search_layout)
         layout.addWidget(self.items_table)
+        layout.addLayout(page_layout)
         layout.addWidget(form_group)
 
         widget.setLayout(layout)
@@ -424,9 +764,10 @@ class InventoryApp(QMainWindow, StyledWidget):
         layout = QHBoxLayout()
 
         # Categories list
-        self.categories_list = QListWidget()
+        self.categories_list = QListView()
+        self.categories_list.setModel(CategoryListProxy(self.categories_model, self))
         self.categories_list.setMinimumWidth(200)
-        self.categories_list.itemClicked.connect(self.load_category_details)
+        self.categories_list.clicked.connect(self.load_category_details)
 
         # Category form
         form_group = QGroupBox("Add/Edit Category")
@@ -487,9 +828,14 @@ class InventoryApp(QMainWindow, StyledWidget):
         report_layout.addWidget(category_btn)
 
         # Report display
-        self.report_display = QTextEdit()
+        self.report_display = QPlainTextEdit()
         self.report_display.setReadOnly(True)
+        self.report_display.setUndoRedoEnabled(False) # No undo history for multi-megabyte reports
         self.report_display.setFont(QFont("Consolas", 10)) # Monospace font for reports
+        self.report_chunks = iter(())
+        self.report_timer = QTimer(self)
+        self.report_timer.setInterval(0)
+        self.report_timer.timeout.connect(self.append_report_chunk)
 
         layout.addLayout(report_layout)
         layout.addWidget(self.report_display)
@@ -497,165 +843,202 @@ class InventoryApp(QMainWindow, StyledWidget):
         widget.setLayout(layout)
         return widget
 
-    def refresh_all_data(self):
-        """Refresh all data in the application"""
-        self.load_categories() # Ensure categories are loaded first as items depend on them
-        self.load_items()
-        self.update_dashboard()
-        self.statusBar().showMessage("Data refreshed", 2000)
+    def create_diagnostics_tab(self):
+        """Create the diagnostics tab showing live query and operation timings"""
+        widget = QWidget()
+        layout = QVBoxLayout()
+
+        controls = QHBoxLayout()
+        self.profiling_enabled = QCheckBox("Enable profiling")
+        self.profiling_enabled.setChecked(self.db_manager.profiler is not None)
+        self.profiling_enabled.toggled.connect(self.set_profiling)
+        self.profiler = self.db_manager.profiler # Kept while profiling is off, so re-enabling resumes it
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self.reset_profiling)
+        save_json_btn = QPushButton("Save JSON...")
+        save_json_btn.clicked.connect(lambda: self.save_profile("inventory_profile.json", "JSON Files (*.json)"))
+        save_prom_btn = QPushButton("Save Prometheus...")
+        save_prom_btn.clicked.connect(lambda: self.save_profile("inventory_profile.prom", "Prometheus Text (*.prom)"))
+
+        controls.addWidget(self.profiling_enabled)
+        controls.addStretch()
+        controls.addWidget(reset_btn)
+        controls.addWidget(save_json_btn)
+        controls.addWidget(save_prom_btn)
+
+        self.diagnostics_display = QPlainTextEdit()
+        self.diagnostics_display.setReadOnly(True)
+        self.diagnostics_display.setUndoRedoEnabled(False)
+        self.diagnostics_display.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.diagnostics_display.setFont(QFont("Consolas", 9))
+        # Redraw once a second, and only while the tab is on screen
+        self.diagnostics_timer = QTimer(self)
+        self.diagnostics_timer.setInterval(1000)
+        self.diagnostics_timer.timeout.connect(self.update_diagnostics)
+        self.diagnostics_timer.start()
+
+        layout.addLayout(controls)
+        layout.addWidget(self.diagnostics_display)
+
+        widget.setLayout(layout)
+        return widget
+
+    def set_profiling(self, enabled):
+        if enabled and self.profiler is None:
+            self.profiler = Profiler()
+        self.db_manager.profiler = self.profiler if enabled else None
+        self.update_diagnostics()
+
+    def reset_profiling(self):
+        if self.profiler is not None:
+            self.profiler.reset()
+        self.update_diagnostics()
+
+    def update_diagnostics(self):
+        """Redraw the diagnostics text if the tab is visible"""
+        if not self.diagnostics_widget.isVisible():
+            return
+        if self.profiler is None:
+            text = ("Profiling is off. Enable it here, or start the application with INVENTORY_PROFILE=1 "
+                    "(INVENTORY_SLOW_QUERY_MS sets the slow query threshold).")
+        else:
+            text = self.profiler.to_text()
+        if text != self.diagnostics_display.toPlainText():
+            scroll = self.diagnostics_display.verticalScrollBar().value()
+            self.diagnostics_display.setPlainText(text)
+            self.diagnostics_display.verticalScrollBar().setValue(scroll)
+
+    def save_profile(self, default_name, file_filter):
+        """Write the collected profile as JSON or Prometheus text"""
+        if self.profiler is None:
+            QMessageBox.warning(self, "Warning", "Profiling is not enabled.")
+            return
+        filename, _ = QFileDialog.getSaveFileName(self, "Save Profile", default_name, file_filter)
+        if filename:
+            try:
+                self.profiler.dump(filename)
+                self.statusBar().showMessage(f"Profile saved to {filename}", 3000)
+            except OSError as e:
+                QMessageBox.critical(self, "Error", f"Could not save the profile: {e}")
+
+    def refresh_all_data(self, reload_categories=False):
+        """Refresh all data in the application; reload_categories also re-reads categories written elsewhere"""
+        with self.db_manager.profile("refresh_all_data"):
+            self.mark_changes_seen() # Everything logged so far is covered by this reload
+            if reload_categories:
+                self.db_manager.categories.invalidate()
+            self.load_categories() # Ensure categories are loaded first as items depend on them
+            self.load_items()
+            self.update_dashboard()
+            self.statusBar().showMessage("Data refreshed", 2000)
+
+    def mark_changes_seen(self):
+        """Start polling for changes from the current end of the change log"""
+        self.data_version = self.db_manager.data_version()
+        self.change_position = self.db_manager.change_log_position()
+
+    def poll_changes(self):
+        """Apply rows other connections wrote since the last poll; one PRAGMA when there are none"""
+        version = self.db_manager.data_version()
+        if version == self.data_version:
+            return
+        self.data_version = version
+        with self.db_manager.profile("poll_changes"):
+            self.change_position, changes = self.db_manager.changes_since(self.change_position)
+            if not changes and changes is not None:
+                return # Nothing shown here was written, e.g. only users
+            item_ids = dict.fromkeys(row_id for table, row_id, op in changes or () if table == "items")
+            if (changes is None # Fell behind the trimmed log
+                    or len(item_ids) > self.items_model.page_size or any(op == "bulk_insert" for _, _, op in changes)):
+                self.refresh_all_data(reload_categories=True) # Cheaper than patching row by row
+                return
+
+            category_ids = dict.fromkeys(row_id for table, row_id, op in changes if table == "categories")
+            if category_ids:
+                self.db_manager.categories.invalidate()
+                self.load_categories()
+                for cat_id in category_ids: # Renamed or deleted categories of loaded rows
+                    self.items_model.update_category_name(cat_id, self.db_manager.categories.name_of(cat_id))
+            for item_id in item_ids:
+                self.items_model.refresh_item(item_id)
+            self.update_dashboard()
 
     def load_items(self):
         """Load items into the table"""
-        items = self.db_manager.execute_query("""
-            SELECT i.id, i.name, c.name AS category_name, i.quantity, i.price, i.min_stock, i.supplier, i.date_added
-            FROM items i LEFT JOIN categories c ON i.category_id = c.id
-            ORDER BY i.id ASC
-        """, fetch=True)
-
-        self.items_table.setRowCount(len(items) if items else 0)
-
-        if items:
-            for row, item_data in enumerate(items):
-                # Ensure values are robust to None for display
-                item_id = str(item_data['id'])
-                item_name = str(item_data['name'] or "")
-                category_name = str(item_data['category_name'] or "N/A")
-                quantity = int(item_data['quantity'] or 0)
-                price = float(item_data['price'] or 0.0)
-                min_stock = int(item_data['min_stock'] or 0)
-                supplier = str(item_data['supplier'] or "")
-                date_added = str(item_data['date_added'] or "")
-
-                self.items_table.setItem(row, 0, QTableWidgetItem(item_id))
-                self.items_table.setItem(row, 1, QTableWidgetItem(item_name))
-                self.items_table.setItem(row, 2, QTableWidgetItem(category_name))
-                self.items_table.setItem(row, 3, QTableWidgetItem(str(quantity)))
-                self.items_table.setItem(row, 4, QTableWidgetItem(f"${price:.2f}"))
-                self.items_table.setItem(row, 5, QTableWidgetItem(str(min_stock)))
-                self.items_table.setItem(row, 6, QTableWidgetItem(supplier))
-                self.items_table.setItem(row, 7, QTableWidgetItem(date_added))
-
-                # Highlight low stock items
-                if quantity <= min_stock:
-                    for col in range(self.items_table.columnCount()):
-                        self.items_table.item(row, col).setBackground(QColor(255, 220, 220)) # Lighter red highlight
-                else:
-                    # Clear background if it was previously highlighted
-                    for col in range(self.items_table.columnCount()):
-                        # Check if row is even or odd for alternating background
-                        if row % 2 == 0:
-                            self.items_table.item(row, col).setBackground(QColor(Qt.white))
-                        else:
-                            self.items_table.item(row, col).setBackground(QColor("#f9f9f9"))
-
-        self.items_table.resizeColumnsToContents() # Auto-adjust column widths
-        self.items_table.resizeRowsToContents()
-
-    def load_item_details_to_form(self, item):
+        with self.db_manager.profile("load_items"):
+            self.items_model.reload()
+            self.items_table.resizeColumnsToContents() # Auto-adjust column widths to the first page
+
+    def update_page_controls(self):
+        """Show the page number and enable the buttons that lead somewhere"""
+        model = self.items_model
+        self.page_label.setText(f"Page {model.page}")
+        self.prev_page_btn.setEnabled(model.page > 1)
+        self.next_page_btn.setEnabled(model.has_next)
+
+    def load_item_details_to_form(self, index):
         """Load selected item details into the form for editing."""
-        row = item.row()
-        item_id = self.items_table.item(row, 0).text()
-        item_name = self.items_table.item(row, 1).text()
-        category_name = self.items_table.item(row, 2).text()
-        quantity = int(self.items_table.item(row, 3).text())
-        price_str = self.items_table.item(row, 4).text().replace('$', '') # Remove '$'
-        price = float(price_str)
-        min_stock = int(self.items_table.item(row, 5).text())
-        supplier = self.items_table.item(row, 6).text()
-
-        self.item_name.setText(item_name)
-        # Set category dropdown
-        index = self.item_category.findText(category_name, Qt.MatchExactly)
-        if index == -1 and category_name == "N/A":
-            index = self.item_category.findData(0) # Find the "Select Category" or 0 ID
-            if index == -1: # Fallback if "Select Category" isn't present
-                index = 0
-        if index != -1:
-            self.item_category.setCurrentIndex(index)
-        else:
-            self.item_category.setCurrentIndex(0) # Default to first item if not found
+        record = self.items_model.record(index.row()) # Typed values as loaded, no parsing or query
 
-        self.item_quantity.setValue(quantity)
-        self.item_price.setValue(price)
-        self.item_min_stock.setValue(min_stock)
-        self.item_supplier.setText(supplier)
+        self.item_name.setText(record.name)
+        # Set category dropdown; an unknown category falls back to "Select Category"
+        self.item_category.setCurrentIndex(self.category_rows.get(record.category_id, 0))
 
+        self.item_quantity.setValue(record.quantity)
+        self.item_price.setValue(record.price)
+        self.item_min_stock.setValue(record.min_stock)
+        self.item_supplier.setText(record.supplier)
+        self.loaded_quantity = record.quantity # Edits to the quantity are saved as a stock movement from here
 
-    def load_categories(self):
-        """Load categories into dropdowns and lists"""
-        categories = self.db_manager.execute_query("SELECT id, name FROM categories ORDER BY name ASC", fetch=True)
-
-        # Update category dropdown in items form
-        self.item_category.clear()
-        self.item_category.addItem("Select Category", 0) # Value 0 for no category selected
-        if categories:
-            for cat_data in categories:
-                self.item_category.addItem(cat_data['name'], cat_data['id'])
-
-        # Update category filter
-        self.category_filter.clear()
-        self.category_filter.addItem("All Categories")
-        if categories:
-            for cat_data in categories:
-                self.category_filter.addItem(cat_data['name'])
-
-        # Update categories list
-        self.categories_list.clear()
-        if categories:
-            for cat_data in categories:
-                list_item = QListWidgetItem(cat_data['name'])
-                list_item.setData(Qt.UserRole, cat_data['id'])
-                self.categories_list.addItem(list_item)
 
+    def load_categories(self):
+        """Rebuild the shared categories model if the category cache changed since the last build"""
+        with self.db_manager.profile("load_categories"):
+            version, categories = self.db_manager.categories.snapshot()
+            if version == self.categories_version:
+                return # No category was written; the model is current
+            self.categories_version = version
+
+            # Rebuild in one pass, keeping both combo selections; re-filter only if the filtered category is gone
+            selected_category = self.item_category.currentData()
+            selected_filter = self.category_filter.currentData()
+            self.item_category.blockSignals(True)
+            self.category_filter.blockSignals(True)
+            self.categories_model.clear()
+            self.categories_model.appendColumn(
+                [category_item("", 0)] + [category_item(name, cat_id) for cat_id, name in categories.items()])
+            self.category_rows = {cat_id: row for row, cat_id in enumerate((0, *categories))}
+            self.item_category.setCurrentIndex(self.category_rows.get(selected_category, 0))
+            self.category_filter.setCurrentIndex(self.category_rows.get(selected_filter, 0))
+            self.item_category.blockSignals(False)
+            self.category_filter.blockSignals(False)
+            if selected_filter not in self.category_rows:
+                self.filter_items()
 
     def update_dashboard(self):
         """Update dashboard statistics and chart"""
-        # Update total items card
-        total_items_count = self.db_manager.execute_query("SELECT COUNT(*) FROM items", fetch=True)[0][0]
-        # Access the QLabel inside the stat card by its object name
-        self.total_items_card.findChild(QLabel, "statValueLabel_totalItemsLabel").setText(str(total_items_count))
-
-        # Update low stock items card
-        low_stock_count = self.db_manager.execute_query(
-            "SELECT COUNT(*) FROM items WHERE quantity <= min_stock", fetch=True)[0][0]
-        self.low_stock_card.findChild(QLabel, "statValueLabel_lowStockLabel").setText(str(low_stock_count))
-
-        # Update total categories card
-        total_categories_count = self.db_manager.execute_query("SELECT COUNT(*) FROM categories", fetch=True)[0][0]
-        self.categories_card.findChild(QLabel, "statValueLabel_categoriesLabel").setText(str(total_categories_count))
-
-        # Update chart with current stock levels (Top 10 lowest stock)
-        items_data = self.db_manager.execute_query(
-            "SELECT name, quantity FROM items ORDER BY quantity ASC LIMIT 10", fetch=True)
-
-        # Convert sqlite3.Row objects to tuples for chart
-        if items_data:
-            chart_data = [(item['name'], item['quantity']) for item in items_data]
-            self.chart_widget.plot_stock_levels(chart_data)
-        else:
-            self.chart_widget.plot_stock_levels([]) # Clear chart if no data
-
-    def filter_items(self):
-        """Filter items based on search and category"""
-        search_text = self.search_input.text().lower()
-        category_text = self.category_filter.currentText()
+        with self.db_manager.profile("update_dashboard"):
+            stats = self.db_manager.get_dashboard_stats()
 
-        for row in range(self.items_table.rowCount()):
-            show_row = True
+            # Access the QLabel inside each stat card by its object name
+            self.total_items_card.findChild(QLabel, "statValueLabel_totalItemsLabel").setText(str(stats['total_items']))
+            self.low_stock_card.findChild(QLabel, "statValueLabel_lowStockLabel").setText(str(stats['low_stock_items']))
+            self.categories_card.findChild(QLabel, "statValueLabel_categoriesLabel").setText(str(stats['total_categories']))
 
-            # Check search text
-            if search_text:
-                item_name = self.items_table.item(row, 1).text().lower()
-                if search_text not in item_name:
-                    show_row = False
+            # Update chart with current stock levels (Top 10 lowest stock); clears the chart if there is no data
+            self.chart_widget.plot_stock_levels(stats['lowest_stock'])
 
-            # Check category filter
-            if category_text != "All Categories":
-                item_category = self.items_table.item(row, 2).text()
-                if category_text != item_category:
-                    show_row = False
+    def item_changed(self, item_id):
+        """Patch the table row and dashboard after one item was added, updated or deleted"""
+        self.items_model.refresh_item(item_id)
+        self.update_dashboard()
 
-            self.items_table.setRowHidden(row, not show_row)
+    def filter_items(self):
+        """Filter items based on search and category"""
+        with self.db_manager.profile("filter_items"):
+            self.search_timer.stop() # A pending debounced search is covered by this query
+            self.items_model.set_filters(self.search_input.text().strip(), self.category_filter.currentData(),
+                                         self.low_stock_only.isChecked())
 
     def add_item(self):
         """Add new item to inventory"""
@@ -668,22 +1051,17 @@ class InventoryApp(QMainWindow, StyledWidget):
         # Allows adding items without a category (category_id 0 or NULL)
 
         try:
-            self.db_manager.execute_query("""
-                INSERT INTO items (name, category_id, quantity, price, min_stock, supplier, date_added)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
+            new_row = self.db_manager.insert_item(
                 item_name,
-                category_id if category_id != 0 else None, # Store None if "Select Category" is chosen
+                category_id, # Stored as NULL if "Select Category" is chosen
                 self.item_quantity.value(),
                 self.item_price.value(),
                 self.item_min_stock.value(),
-                self.item_supplier.text().strip(),
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            ))
+                self.item_supplier.text().strip()
+            )
 
             self.clear_item_form()
-            self.load_items()
-            self.update_dashboard()
+            self.item_changed(new_row['id'])
             QMessageBox.information(self, "Success", "Item added successfully!")
         except sqlite3.IntegrityError as e:
             # You might want to handle unique item names, but it's less common for items
@@ -693,12 +1071,12 @@ class InventoryApp(QMainWindow, StyledWidget):
 
     def update_item(self):
         """Update selected item"""
-        current_row = self.items_table.currentRow()
+        current_row = self.items_table.currentIndex().row()
         if current_row < 0:
             QMessageBox.warning(self, "Error", "Please select an item to update!")
             return
 
-        item_id = self.items_table.item(current_row, 0).text()
+        item_id = self.items_model.record(current_row).id
         item_name = self.item_name.text().strip()
         category_id = self.item_category.currentData() # Will be 0 if "Select Category" is chosen
 
@@ -707,31 +1085,39 @@ class InventoryApp(QMainWindow, StyledWidget):
             return
 
         try:
-            self.db_manager.execute_query("""
-                UPDATE items SET name=?, category_id=?, quantity=?, price=?, min_stock=?, supplier=?
-                WHERE id=?
-            """, (
+            # Apply the quantity edit as a relative adjustment, so stock moved by someone else
+            # since the item was loaded is not overwritten; it is committed together with the fields
+            delta = self.item_quantity.value() - self.loaded_quantity if self.loaded_quantity is not None else 0
+
+            self.db_manager.update_item(
+                item_id,
                 item_name,
-                category_id if category_id != 0 else None, # Store None if "Select Category" is chosen
-                self.item_quantity.value(),
+                category_id, # Stored as NULL if "Select Category" is chosen
+                None if self.loaded_quantity is not None else self.item_quantity.value(),
                 self.item_price.value(),
                 self.item_min_stock.value(),
                 self.item_supplier.text().strip(),
-                item_id
-            ))
+                delta=delta
+            )
 
             self.clear_item_form()
-            self.load_items()
-            self.update_dashboard()
+            self.item_changed(item_id)
             QMessageBox.information(self, "Success", "Item updated successfully!")
         except sqlite3.IntegrityError as e:
-             QMessageBox.warning(self, "Duplicate Item", f"An item with the name '{item_name}' might already exist, or another integrity error occurred: {e}")
+            if "FOREIGN KEY" in str(e): # The chosen category was deleted meanwhile; nothing was changed
+                QMessageBox.warning(self, "Category Deleted", "The selected category no longer exists. Please choose another one.")
+                self.refresh_all_data(reload_categories=True)
+                return
+            QMessageBox.warning(self, "Duplicate Item", f"An item with the name '{item_name}' might already exist, or another integrity error occurred: {e}")
+        except ValueError as e:
+            QMessageBox.warning(self, "Stock Error", str(e)) # e.g. the adjustment would take the stock below zero
+            self.item_changed(item_id)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to update item: {e}")
 
     def delete_item(self):
         """Delete selected item"""
-        current_row = self.items_table.currentRow()
+        current_row = self.items_table.currentIndex().row()
         if current_row < 0:
             QMessageBox.warning(self, "Error", "Please select an item to delete!")
             return
@@ -740,12 +1126,11 @@ class InventoryApp(QMainWindow, StyledWidget):
                                      QMessageBox.Yes | QMessageBox.No)
 
         if reply == QMessageBox.Yes:
-            item_id = self.items_table.item(current_row, 0).text()
+            item_id = self.items_model.record(current_row).id
             try:
-                self.db_manager.execute_query("DELETE FROM items WHERE id=?", (item_id,))
+                self.db_manager.delete_item(item_id)
                 self.clear_item_form()
-                self.load_items()
-                self.update_dashboard()
+                self.item_changed(item_id)
                 QMessageBox.information(self, "Success", "Item deleted successfully!")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to delete item: {e}")
@@ -758,6 +1143,7 @@ class InventoryApp(QMainWindow, StyledWidget):
         self.item_price.setValue(0.00)
         self.item_min_stock.setValue(0)
         self.item_supplier.clear()
+        self.loaded_quantity = None
         self.items_table.clearSelection() # Clear selection in table
 
     def add_category(self):
@@ -768,10 +1154,7 @@ class InventoryApp(QMainWindow, StyledWidget):
             return
 
         try:
-            self.db_manager.execute_query(
-                "INSERT INTO categories (name, description) VALUES (?, ?)",
-                (category_name, self.category_description.toPlainText().strip())
-            )
+            self.db_manager.add_category(category_name, self.category_description.toPlainText().strip())
             self.clear_category_form()
             self.load_categories()
             self.update_dashboard()
@@ -787,26 +1170,21 @@ class InventoryApp(QMainWindow, StyledWidget):
 
     def update_category(self):
         """Update selected category"""
-        current_item = self.categories_list.currentItem()
-        if not current_item:
+        cat_id = self.selected_category_id()
+        if cat_id is None:
             QMessageBox.warning(self, "Error", "Please select a category to update!")
             return
 
-        cat_id = current_item.data(Qt.UserRole)
         category_name = self.category_name.text().strip()
         if not category_name:
             QMessageBox.warning(self, "Error", "Category name cannot be empty!")
             return
 
         try:
-            self.db_manager.execute_query(
-                "UPDATE categories SET name=?, description=? WHERE id=?",
-                (category_name, self.category_description.toPlainText().strip(), cat_id)
-            )
+            self.db_manager.update_category(cat_id, category_name, self.category_description.toPlainText().strip())
             self.clear_category_form()
             self.load_categories()
-            self.load_items() # Important: Item category names might change if updated
-            self.update_dashboard()
+            self.items_model.update_category_name(cat_id, category_name) # Item category names change with it
             QMessageBox.information(self, "Success", "Category updated successfully!")
         except sqlite3.IntegrityError as e:
             if "UNIQUE constraint failed: categories.name" in str(e):
@@ -819,8 +1197,8 @@ class InventoryApp(QMainWindow, StyledWidget):
 
     def delete_category(self):
         """Delete selected category"""
-        current_item = self.categories_list.currentItem()
-        if not current_item:
+        cat_id = self.selected_category_id()
+        if cat_id is None:
             QMessageBox.warning(self, "Error", "Please select a category to delete!")
             return
 
@@ -829,15 +1207,12 @@ class InventoryApp(QMainWindow, StyledWidget):
                                      QMessageBox.Yes | QMessageBox.No)
 
         if reply == QMessageBox.Yes:
-            cat_id = current_item.data(Qt.UserRole)
             try:
-                # The ON DELETE SET NULL constraint in the database schema handles this automatically.
-                # No manual UPDATE items query needed here.
-                self.db_manager.execute_query("DELETE FROM categories WHERE id=?", (cat_id,))
+                self.db_manager.delete_category(cat_id)
 
                 self.clear_category_form()
                 self.load_categories()
-                self.load_items()      # Items will need to refresh as their category might be gone
+                self.items_model.update_category_name(cat_id, None) # Loaded items become uncategorized
                 self.update_dashboard()
                 QMessageBox.information(self, "Success", "Category deleted successfully!")
             except Exception as e:
@@ -849,9 +1224,14 @@ class InventoryApp(QMainWindow, StyledWidget):
         self.category_description.clear()
         self.categories_list.clearSelection() # Clear selection in list
 
-    def load_category_details(self, item):
+    def selected_category_id(self):
+        """Return the id of the current category in the categories list, or None"""
+        index = self.categories_list.currentIndex()
+        return index.data(Qt.UserRole) if index.isValid() else None
+
+    def load_category_details(self, index):
         """Load category details into form"""
-        cat_id = item.data(Qt.UserRole)
+        cat_id = index.data(Qt.UserRole)
         try:
             category_data = self.db_manager.execute_query(
                 "SELECT name, description FROM categories WHERE id=?", (cat_id,), fetch=True)
@@ -869,127 +1249,76 @@ class InventoryApp(QMainWindow, StyledWidget):
 
     def generate_low_stock_report(self):
         """Generate low stock report"""
-        items = self.db_manager.execute_query("""
-            SELECT i.name, c.name AS category_name, i.quantity, i.min_stock
-            FROM items i LEFT JOIN categories c ON i.category_id = c.id
-            WHERE i.quantity <= i.min_stock
-            ORDER BY i.quantity ASC
-        """, fetch=True)
-
-        report = "LOW STOCK REPORT\n" + "="*50 + "\n\n"
-
-        if items:
-            for item_data in items: # Use item_data as dict/row
-                report += f"Item: {item_data['name']}\n"
-                report += f"Category: {item_data['category_name'] or 'N/A'}\n" # Corrected to item_data['category_name']
-                report += f"Current Stock: {item_data['quantity']}\n"
-                report += f"Minimum Stock: {item_data['min_stock']}\n"
-                report += "-" * 30 + "\n"
-        else:
-            report += "No items are currently low in stock.\n"
-
-        self.report_display.setText(report)
+        self.generate_report("low-stock", "Low stock report")
 
     def generate_inventory_report(self):
         """Generate full inventory report"""
-        items = self.db_manager.execute_query("""
-            SELECT i.name, c.name AS category_name, i.quantity, i.price, i.supplier
-            FROM items i LEFT JOIN categories c ON i.category_id = c.id
-            ORDER BY i.name
-        """, fetch=True)
-
-        report = "FULL INVENTORY REPORT\n" + "="*50 + "\n\n"
-        total_value = 0
-
-        if items:
-            for item_data in items: # Use item_data as dict/row
-                value = (item_data['quantity'] or 0) * (item_data['price'] or 0)
-                total_value += value
-
-                report += f"Item: {item_data['name']}\n"
-                report += f"Category: {item_data['category_name'] or 'N/A'}\n"
-                report += f"Quantity: {item_data['quantity'] or 0}\n"
-                report += f"Price: ${item_data['price'] or 0:.2f}\n"
-                report += f"Total Value: ${value:.2f}\n"
-                report += f"Supplier: {item_data['supplier'] or 'N/A'}\n"
-                report += "-" * 30 + "\n"
-
-            report += f"\nTOTAL INVENTORY VALUE: ${total_value:.2f}\n"
-        else:
-            report += "No items in inventory.\n"
-
-        self.report_display.setText(report)
+        self.generate_report("inventory", "Inventory report")
 
     def generate_category_report(self):
         """Generate category-wise report"""
-        categories = self.db_manager.execute_query("""
-            SELECT c.name, COUNT(i.id) as item_count, SUM(i.quantity * i.price) as total_value
-            FROM categories c LEFT JOIN items i ON c.id = i.category_id
-            GROUP BY c.id, c.name
-            ORDER BY total_value DESC
-        """, fetch=True)
-
-        report = "CATEGORY REPORT\n" + "="*50 + "\n\n"
-
-        if categories:
-            for cat_data in categories: # Use cat_data as dict/row
-                report += f"Category: {cat_data['name']}\n"
-                report += f"Number of Items: {cat_data['item_count'] or 0}\n"
-                report += f"Total Value: ${cat_data['total_value'] or 0:.2f}\n"
-                report += "-" * 30 + "\n"
-        else:
-            report += "No categories found.\n"
-
-        self.report_display.setText(report)
+        self.generate_report("category", "Category report")
+
+    def generate_report(self, name, label):
+        """Render one of inventory_reports.REPORTS in the background, then display it"""
+        self.run_job(label, lambda db_manager, progress: inventory_reports.render_report(name, db_manager, progress),
+                     self.show_report)
+
+    def show_report(self, chunks):
+        """Append report chunks one per event loop pass so a large report never lays out at once"""
+        self.report_display.clear()
+        self.report_chunks = iter(chunks)
+        self.report_first_chunk = True
+        self.report_timer.start()
+
+    def append_report_chunk(self):
+        chunk = next(self.report_chunks, None)
+        if chunk is None:
+            self.report_timer.stop()
+            return
+        self.report_display.appendPlainText(chunk)
+        if self.report_first_chunk:
+            self.report_first_chunk = False
+            self.report_display.verticalScrollBar().setValue(0) # Keep the start of the report in view
 
     def export_to_excel(self):
         """Export inventory data to Excel"""
-        try:
-            items = self.db_manager.execute_query("""
-                SELECT i.name, c.name AS category_name, i.quantity, i.price, i.min_stock, i.supplier, i.date_added
-                FROM items i LEFT JOIN categories c ON i.category_id = c.id
-            """, fetch=True)
+        self.export_data("xlsx", "Save Excel File", "inventory_export.xlsx", "Excel Files (*.xlsx)")
 
-            if not items:
+    def export_to_csv(self):
+        """Export inventory data to CSV"""
+        self.export_data("csv", "Save CSV File", "inventory_export.csv", "CSV Files (*.csv)")
+
+    def export_to_parquet(self):
+        """Export inventory data to Parquet"""
+        self.export_data("parquet", "Save Parquet File", "inventory_export.parquet", "Parquet Files (*.parquet)")
+
+    def export_data(self, export_format, title, default_name, file_filter):
+        """Stream the inventory to a file in one of inventory_export.EXPORT_FORMATS"""
+        try:
+            if self.db_manager.get_dashboard_stats()['total_items'] == 0:
                 QMessageBox.warning(self, "Warning", "No data to export!")
                 return
 
-            # Convert list of sqlite3.Row objects to list of lists for DataFrame
-            data_for_df = []
-            for item_row in items:
-                data_for_df.append([
-                    item_row['name'],
-                    item_row['category_name'] or 'N/A',
-                    item_row['quantity'],
-                    item_row['price'],
-                    item_row['min_stock'],
-                    item_row['supplier'],
-                    item_row['date_added']
-                ])
-
-            filename, _ = QFileDialog.getSaveFileName(
-                self, "Save Excel File", "inventory_export.xlsx", "Excel Files (*.xlsx)")
+            filename, _ = QFileDialog.getSaveFileName(self, title, default_name, file_filter)
 
             if filename:
-                df = pd.DataFrame(data_for_df, columns=[
-                    'Item Name', 'Category', 'Quantity', 'Price', 'Min Stock', 'Supplier', 'Date Added'
-                ])
-                df.to_excel(filename, index=False)
-                QMessageBox.information(self, "Success", f"Data exported to {filename}")
+                self.run_export_job(f"{export_format.upper()} export", export_format, filename)
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Export failed: {str(e)}")
 
+    def run_export_job(self, label, export_format, filename):
+        """Run an inventory_export.write_export in the background"""
+        self.run_job(label,
+                     lambda db_manager, progress: inventory_export.write_export(
+                         db_manager, export_format, filename, progress),
+                     lambda _: QMessageBox.information(self, "Success", f"Data exported to {filename}"))
+
     def export_to_pdf(self):
         """Export inventory data to PDF"""
         try:
-            items = self.db_manager.execute_query("""
-                SELECT i.name, c.name AS category_name, i.quantity, i.price, i.min_stock, i.supplier
-                FROM items i LEFT JOIN categories c ON i.category_id = c.id
-                ORDER BY i.name
-            """, fetch=True)
-
-            if not items:
+            if self.db_manager.get_dashboard_stats()['total_items'] == 0:
                 QMessageBox.warning(self, "Warning", "No data to export!")
                 return
 
@@ -997,77 +1326,75 @@ class InventoryApp(QMainWindow, StyledWidget):
                 self, "Save PDF File", "inventory_report.pdf", "PDF Files (*.pdf)")
 
             if filename:
-                c = canvas.Canvas(filename, pagesize=letter)
-                width, height = letter
-                margin = 50
-                line_height = 16
-                y_position = height - margin
-
-                # Title
-                c.setFont("Helvetica-Bold", 18)
-                c.drawString(margin, y_position, "Inventory Report")
-                y_position -= line_height
-
-                c.setFont("Helvetica", 10)
-                c.drawString(margin, y_position, f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                y_position -= (line_height * 2)
-
-                # Headers
-                c.setFont("Helvetica-Bold", 10)
-                headers = ["Item", "Category", "Qty", "Price", "Min Stock", "Supplier"]
-                # Adjust x_positions based on your data and preferred column width
-                x_positions = [margin, margin + 100, margin + 200, margin + 250, margin + 300, margin + 380]
-
-                for i, header in enumerate(headers):
-                    c.drawString(x_positions[i], y_position, header)
-                y_position -= line_height
-
-                c.line(margin, y_position, width - margin, y_position) # Draw a line under headers
-                y_position -= line_height # Space after header line
-
-                # Data
-                c.setFont("Helvetica", 9)
-                row_count = 0
-                # Calculate max_rows_per_page dynamically based on available space
-                # (height - top_margin - bottom_margin - header_block_height) / line_height
-                max_rows_per_page = int((height - (margin * 2) - (line_height * 4)) / line_height) # Estimate
-
-                for item_data in items:
-                    if y_position < margin: # Check if new page is needed
-                        c.showPage() # Start new page
-                        y_position = height - margin # Reset y_position for new page
-                        c.setFont("Helvetica-Bold", 10)
-                        for i, header in enumerate(headers):
-                            c.drawString(x_positions[i], y_position, header)
-                        y_position -= line_height
-                        c.line(margin, y_position, width - margin, y_position)
-                        y_position -= line_height
-                        c.setFont("Helvetica", 9) # Reset font for data
-
-                    item_name = item_data['name'] or ""
-                    category_name = item_data['category_name'] or "N/A"
-                    quantity = str(item_data['quantity'] or 0)
-                    price = f"${item_data['price'] or 0:.2f}"
-                    min_stock = str(item_data['min_stock'] or 0)
-                    supplier = item_data['supplier'] or ""
-
-                    # Draw item data
-                    c.drawString(x_positions[0], y_position, item_name)
-                    c.drawString(x_positions[1], y_position, category_name)
-                    c.drawString(x_positions[2], y_position, quantity)
-                    c.drawString(x_positions[3], y_position, price)
-                    c.drawString(x_positions[4], y_position, min_stock)
-                    c.drawString(x_positions[5], y_position, supplier)
-
-                    y_position -= line_height
-                    row_count += 1
-
-                c.save() # Save the PDF file
-                QMessageBox.information(self, "Success", f"Data exported to {filename}")
+                self.run_export_job("PDF export", "pdf", filename)
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"PDF export failed: {str(e)}")
 
+    def import_items(self):
+        """Bulk import items from a CSV or Excel file in the background"""
+        filename, _ = QFileDialog.getOpenFileName(
+            self, "Import Items", "", "Item Files (*.csv *.xlsx);;CSV Files (*.csv);;Excel Files (*.xlsx)")
+        if not filename:
+            return
+
+        rejects_file = os.path.splitext(filename)[0] + "_rejected.csv"
+        self.run_job("Import",
+                     lambda db_manager, progress: inventory_import.import_items(
+                         db_manager, filename, progress=progress, rejects_file=rejects_file),
+                     self.import_finished)
+
+    def import_finished(self, result):
+        self.refresh_all_data()
+        QMessageBox.information(self, "Import Complete", result.summary())
+
+    def run_job(self, label, func, on_finished):
+        """Run func(db_manager, progress) on the thread pool and pass its result to on_finished"""
+        if self.active_job is not None:
+            QMessageBox.warning(self, "Busy", "Please wait for the running task to finish or cancel it.")
+            return
+
+        def timed(db_manager, progress): # Shows up as an operation in the Diagnostics tab
+            with db_manager.profile(label):
+                return func(db_manager, progress)
+
+        job = BackgroundJob(timed, self.db_manager)
+        job.signals.progress.connect(self.show_job_progress)
+        job.signals.finished.connect(on_finished)
+        job.signals.failed.connect(lambda message: QMessageBox.critical(self, "Error", f"{label} failed: {message}"))
+        job.signals.cancelled.connect(lambda: self.statusBar().showMessage(f"{label} cancelled", 3000))
+        job.signals.done.connect(self.job_done)
+
+        self.active_job = job
+        self.job_progress.setRange(0, 0) # Busy indicator until the first progress report
+        self.job_progress.setFormat(f"{label}: %p%")
+        self.job_progress.show()
+        self.cancel_job_btn.show()
+        self.statusBar().showMessage(f"{label} running...")
+        self.thread_pool.start(job)
+
+    def show_job_progress(self, done, total):
+        self.job_progress.setRange(0, max(total, 1))
+        self.job_progress.setValue(done)
+
+    def cancel_job(self):
+        if self.active_job is not None:
+            self.active_job.cancel()
+
+    def job_done(self):
+        """Hide the progress indicator once the running job has finished, failed or been cancelled"""
+        self.active_job = None
+        self.job_progress.hide()
+        self.cancel_job_btn.hide()
+        self.statusBar().clearMessage()
+
+    def closeEvent(self, event):
+        """Stop background jobs and close pooled database connections when the window closes"""
+        self.cancel_job()
+        self.thread_pool.waitForDone()
+        self.db_manager.close()
+        super().closeEvent(event)
+
     def logout(self):
         """Handle user logout"""
         reply = QMessageBox.question(self, "Logout", "Are you sure you want to log out?",
@@ -0,0 +1,214 @@
+"""Table-based PDF inventory report with page-parallel rendering
+
+Rows are streamed from the database and cut into page ranges. Each range is
+rendered to its own PDF by a worker process, and the parts are merged in order.
+Every page repeats the title and column headers, and cell text is truncated to
+its column width. Without pypdf, or for small reports, pages are rendered in
+this process into a single canvas instead.
+"""
+import math
+import os
+from datetime import datetime
+
+PDF_QUERY = """
+    SELECT i.name, COALESCE(c.name, 'N/A'), COALESCE(i.quantity, 0), COALESCE(i.price, 0),
+           COALESCE(i.min_stock, 0), i.supplier
+    FROM items i LEFT JOIN categories c ON i.category_id = c.id
+    ORDER BY i.name, i.id
+"""
+
+PAGE_WIDTH, PAGE_HEIGHT = 612.0, 792.0 # US letter, in points
+MARGIN = 50
+LINE_HEIGHT = 16
+HEADER_HEIGHT = LINE_HEIGHT * 4  # Title, generated-on line, column headers and rule
+ROWS_PER_PAGE = int((PAGE_HEIGHT - 2 * MARGIN - HEADER_HEIGHT) / LINE_HEIGHT)
+PAGES_PER_CHUNK = 25             # Pages rendered by one worker task
+
+# (header, width in points, right aligned); widths add up to the printable width
+COLUMNS = [
+    ("Item", 150, False),
+    ("Category", 100, False),
+    ("Qty", 45, True),
+    ("Price", 60, True),
+    ("Min Stock", 55, True),
+    ("Supplier", 102, False),
+]
+CELL_PADDING = 4
+DATA_FONT = ("Helvetica", 9)
+HEADER_FONT = ("Helvetica-Bold", 10)
+
+
+def _fit(text, font, size, width, cache):
+    """Truncate text with '...' so it fits in width points"""
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    key = (text, width)
+    if key in cache:
+        return cache[key]
+    fitted = text
+    if stringWidth(text, font, size) > width:
+        ellipsis_width = stringWidth("...", font, size)
+        # Binary search for the longest prefix that fits next to the ellipsis
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if stringWidth(text[:mid], font, size) + ellipsis_width <= width:
+                low = mid
+            else:
+                high = mid - 1
+        fitted = text[:low].rstrip() + "..."
+    if len(cache) < 10000:
+        cache[key] = fitted
+    return fitted
+
+
+def _draw_pages(c, rows, first_page, total_pages, generated_on):
+    """Draw rows onto c starting at page number first_page, ROWS_PER_PAGE rows to a page"""
+    x_positions = []
+    x = MARGIN
+    for _, width, _ in COLUMNS:
+        x_positions.append(x)
+        x += width
+    fit_cache = {}
+
+    for page_offset in range(0, max(len(rows), 1), ROWS_PER_PAGE):
+        page_rows = rows[page_offset:page_offset + ROWS_PER_PAGE]
+        page_number = first_page + page_offset // ROWS_PER_PAGE
+        y = PAGE_HEIGHT - MARGIN
+
+        # Title block and column headers, repeated on every page
+        c.setFont("Helvetica-Bold", 18)
+        c.drawString(MARGIN, y, "Inventory Report")
+        c.setFont("Helvetica", 10)
+        c.drawRightString(PAGE_WIDTH - MARGIN, y, f"Page {page_number} of {total_pages}")
+        y -= LINE_HEIGHT
+        c.drawString(MARGIN, y, f"Generated on: {generated_on}")
+        y -= LINE_HEIGHT * 2
+
+        c.setFont(*HEADER_FONT)
+        for (header, width, right), x in zip(COLUMNS, x_positions):
+            if right:
+                c.drawRightString(x + width - CELL_PADDING, y, header)
+            else:
+                c.drawString(x, y, header)
+        y -= LINE_HEIGHT // 2
+        c.line(MARGIN, y, PAGE_WIDTH - MARGIN, y) # Draw a line under headers
+        y -= LINE_HEIGHT
+
+        c.setFont(*DATA_FONT)
+        for name, category, quantity, price, min_stock, supplier in page_rows:
+            cells = (name or "", category, str(quantity), f"${price:.2f}", str(min_stock), supplier or "")
+            for text, (_, width, right), x in zip(cells, COLUMNS, x_positions):
+                text = _fit(text, DATA_FONT[0], DATA_FONT[1], width - CELL_PADDING, fit_cache)
+                if right:
+                    c.drawRightString(x + width - CELL_PADDING, y, text)
+                else:
+                    c.drawString(x, y, text)
+            y -= LINE_HEIGHT
+        c.showPage()
+
+
+def render_chunk(rows, first_page, total_pages, generated_on, filename):
+    """Render one page range to its own PDF file; runs in a worker process"""
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(filename, pagesize=(PAGE_WIDTH, PAGE_HEIGHT))
+    _draw_pages(c, rows, first_page, total_pages, generated_on)
+    c.save()
+    return filename
+
+
+def export_pdf(db_manager, filename, progress=None, workers=None, pages_per_chunk=PAGES_PER_CHUNK):
+    """Write the inventory report to filename; returns the number of rows written
+
+    workers defaults to the CPU count. Worker processes are started with the spawn
+    method, which is safe to use from a GUI process with threads running.
+    """
+    from inventory_export import iter_batches, read_snapshot # Not at module level: it imports this module
+
+    # Count and rows come from one snapshot, so "Page N of M" holds while others write
+    with read_snapshot(db_manager) as conn:
+        total_rows = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        chunks = iter_batches(db_manager, PDF_QUERY, ROWS_PER_PAGE * pages_per_chunk, conn=conn)
+        return _export_pdf(chunks, total_rows, filename, progress, workers, pages_per_chunk)
+
+
+def _export_pdf(chunks, total_rows, filename, progress, workers, pages_per_chunk):
+    total_pages = max(math.ceil(total_rows / ROWS_PER_PAGE), 1)
+    generated_on = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    workers = workers or os.cpu_count() or 1
+
+    try:
+        from pypdf import PdfWriter
+    except ImportError:
+        PdfWriter = None
+
+    if PdfWriter is None or workers <= 1 or total_pages <= pages_per_chunk:
+        return _export_single_process(chunks, filename, progress, total_rows, total_pages, generated_on)
+
+    # Imported here rather than at module level to keep them out of application startup
+    import multiprocessing
+    import shutil
+    import tempfile
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    tmp_dir = tempfile.mkdtemp(prefix="inventory_pdf_")
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        parts = []
+        pending = {} # future -> number of rows it renders
+        done_rows = 0
+        first_page = 1
+
+        def collect(futures):
+            nonlocal done_rows
+            for future in futures:
+                future.result() # Re-raise any error from the worker
+                done_rows += pending.pop(future)
+
+        for index, rows in enumerate(chunks):
+            if progress:
+                progress(done_rows, total_rows)
+            # Keep at most two chunks per worker in flight so memory stays bounded
+            while len(pending) >= workers * 2:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+            part = os.path.join(tmp_dir, f"part_{index:06d}.pdf")
+            pending[executor.submit(render_chunk, rows, first_page, total_pages, generated_on, part)] = len(rows)
+            parts.append(part)
+            first_page += math.ceil(len(rows) / ROWS_PER_PAGE)
+
+        while pending:
+            if progress:
+                progress(done_rows, total_rows)
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(finished)
+
+        # Merge the parts in page order
+        writer = PdfWriter()
+        for part in parts:
+            writer.append(part)
+        with open(filename, "wb") as f:
+            writer.write(f)
+        return done_rows
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _export_single_process(chunks, filename, progress, total_rows, total_pages, generated_on):
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(filename, pagesize=(PAGE_WIDTH, PAGE_HEIGHT))
+    done_rows = 0
+    first_page = 1
+    for rows in chunks:
+        if progress:
+            progress(done_rows, total_rows)
+        _draw_pages(c, rows, first_page, total_pages, generated_on)
+        done_rows += len(rows)
+        first_page += math.ceil(len(rows) / ROWS_PER_PAGE)
+    if not done_rows:
+        _draw_pages(c, [], 1, 1, generated_on) # A single page with just the headers
+    c.save()
+    return done_rows
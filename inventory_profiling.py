@@ -0,0 +1,199 @@
+"""Opt-in profiling of SQL statements and application operations
+
+A Profiler attached to a DatabaseManager records, per distinct statement, how
+often it ran, the total and slowest latency and the rows it returned or
+changed. Statements slower than the threshold are kept with their parameters
+and EXPLAIN QUERY PLAN output. Named operations (loading the item list, an
+export) are timed the same way through DatabaseManager.profile(name).
+
+Profiling is off unless INVENTORY_PROFILE=1 is set in the environment, the CLI
+gets --profile, or it is switched on in the GUI's Diagnostics tab; when off,
+the only cost is one attribute check per statement. Results are available as a
+dict (snapshot), JSON and the Prometheus text exposition format.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+DEFAULT_SLOW_MS = 50.0
+MAX_SLOW_QUERIES = 50  # Most recent slow statements kept with their plans
+MAX_STATEMENTS = 500   # Distinct statements tracked; the rest are counted under OTHER_STATEMENT
+OTHER_STATEMENT = "(other statements)"
+
+
+class Timing:
+    """Running totals for one statement or operation"""
+    __slots__ = ("count", "total", "max", "rows")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+
+    def add(self, seconds, rows=0):
+        self.count += 1
+        self.total += seconds
+        self.rows += rows
+        if seconds > self.max:
+            self.max = seconds
+
+    def as_dict(self):
+        return {"count": self.count, "total_ms": round(self.total * 1000, 3),
+                "mean_ms": round(self.total * 1000 / self.count, 3) if self.count else 0.0,
+                "max_ms": round(self.max * 1000, 3), "rows": self.rows}
+
+
+def normalize_sql(sql):
+    """Collapse whitespace so the same statement built on different lines is counted once"""
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def statement_id(sql):
+    """Short stable id of a normalized statement, used as a metric label"""
+    return hashlib.sha1(sql.encode("utf-8")).hexdigest()[:10]
+
+
+class Profiler:
+    """Thread-safe collector of statement and operation timings"""
+
+    def __init__(self, slow_ms=DEFAULT_SLOW_MS):
+        self.slow_seconds = slow_ms / 1000
+        self._lock = threading.Lock()
+        self.reset()
+
+    @classmethod
+    def from_env(cls, environ=os.environ):
+        """Return a Profiler if INVENTORY_PROFILE is set to a true value, else None
+
+        INVENTORY_SLOW_QUERY_MS overrides the slow statement threshold.
+        """
+        if environ.get("INVENTORY_PROFILE", "").lower() not in ("1", "true", "yes", "on"):
+            return None
+        return cls(float(environ.get("INVENTORY_SLOW_QUERY_MS", DEFAULT_SLOW_MS)))
+
+    def reset(self):
+        with self._lock:
+            self._statements = {}
+            self._operations = {}
+            self._slow = deque(maxlen=MAX_SLOW_QUERIES)
+            self._slow_total = 0
+            self.started = time.time()
+
+    def record_query(self, sql, seconds, rows=0, params=None, plan=None):
+        """Add one statement execution; plan is the EXPLAIN QUERY PLAN detail lines of a slow one"""
+        sql = normalize_sql(sql)
+        with self._lock:
+            timing = self._statements.get(sql)
+            if timing is None:
+                if len(self._statements) >= MAX_STATEMENTS:
+                    sql = OTHER_STATEMENT
+                timing = self._statements.setdefault(sql, Timing())
+            timing.add(seconds, rows)
+            if seconds >= self.slow_seconds:
+                self._slow_total += 1
+                self._slow.append({"sql": sql, "ms": round(seconds * 1000, 3), "rows": rows,
+                                   "params": [repr(p) for p in params or ()], "plan": plan or [],
+                                   "at": time.strftime("%Y-%m-%d %H:%M:%S")})
+
+    def record_operation(self, name, seconds):
+        with self._lock:
+            self._operations.setdefault(name, Timing()).add(seconds)
+
+    @contextmanager
+    def operation(self, name):
+        """Time the body of a with block as operation name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_operation(name, time.perf_counter() - start)
+
+    def is_slow(self, seconds):
+        return seconds >= self.slow_seconds
+
+    def snapshot(self):
+        """Return everything recorded so far as a JSON-serializable dict, slowest first"""
+        with self._lock:
+            statements = [dict(timing.as_dict(), id=statement_id(sql), sql=sql)
+                          for sql, timing in self._statements.items()]
+            operations = [dict(timing.as_dict(), name=name) for name, timing in self._operations.items()]
+            slow = list(self._slow)
+            slow_total = self._slow_total
+        statements.sort(key=lambda s: s["total_ms"], reverse=True)
+        operations.sort(key=lambda o: o["total_ms"], reverse=True)
+        return {"started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+                "slow_query_ms": self.slow_seconds * 1000, "slow_queries_total": slow_total,
+                "statements": statements, "operations": operations, "slow_queries": slow[::-1]}
+
+    def to_json(self, indent=2):
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self):
+        """Render the counters in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{_escape_label(val)}"' for key, val in labels)
+                lines.append(f"{name}{{{label_text}}} {value}" if labels else f"{name} {value}")
+
+        # Statements are labelled by their short id only, so the series stay few and scrapes carry no
+        # query text; the JSON snapshot and the Diagnostics tab map each id to its statement
+        statements = snapshot["statements"]
+        query_labels = [(("query", s["id"]),) for s in statements]
+        metric("inventory_queries_total", "counter", "SQL statement executions",
+               [(labels, s["count"]) for labels, s in zip(query_labels, statements)])
+        metric("inventory_query_seconds_total", "counter", "Time spent executing SQL statements",
+               [(labels, round(s["total_ms"] / 1000, 6)) for labels, s in zip(query_labels, statements)])
+        metric("inventory_query_max_seconds", "gauge", "Slowest execution of each SQL statement",
+               [(labels, round(s["max_ms"] / 1000, 6)) for labels, s in zip(query_labels, statements)])
+        metric("inventory_query_rows_total", "counter", "Rows returned or changed by SQL statements",
+               [(labels, s["rows"]) for labels, s in zip(query_labels, statements)])
+        metric("inventory_slow_queries_total", "counter",
+               f"SQL statements slower than {snapshot['slow_query_ms']:g} ms", [((), snapshot["slow_queries_total"])])
+
+        operations = snapshot["operations"]
+        metric("inventory_operations_total", "counter", "Timed application operations",
+               [((("operation", o["name"]),), o["count"]) for o in operations])
+        metric("inventory_operation_seconds_total", "counter", "Time spent in application operations",
+               [((("operation", o["name"]),), round(o["total_ms"] / 1000, 6)) for o in operations])
+        metric("inventory_operation_max_seconds", "gauge", "Slowest run of each application operation",
+               [((("operation", o["name"]),), round(o["max_ms"] / 1000, 6)) for o in operations])
+        return "\n".join(lines) + "\n"
+
+    def to_text(self, top=15):
+        """Render a plain-text summary for the Diagnostics panel"""
+        snapshot = self.snapshot()
+        lines = [f"Profiling since {snapshot['started']}, slow query threshold {snapshot['slow_query_ms']:g} ms", "",
+                 "OPERATIONS", f"{'count':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9}  name"]
+        for o in snapshot["operations"][:top]:
+            lines.append(f"{o['count']:>7} {o['total_ms']:>10.1f} {o['mean_ms']:>9.2f} {o['max_ms']:>9.2f}  {o['name']}")
+        lines += ["", "STATEMENTS (by total time)",
+                  f"{'count':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9} {'rows':>9}  {'query':<10}  sql"]
+        for s in snapshot["statements"][:top]:
+            lines.append(f"{s['count']:>7} {s['total_ms']:>10.1f} {s['mean_ms']:>9.2f} {s['max_ms']:>9.2f} "
+                         f"{s['rows']:>9}  {s['id']}  {s['sql'][:160]}")
+        lines += ["", f"SLOW STATEMENTS ({snapshot['slow_queries_total']} total, latest first)"]
+        for q in snapshot["slow_queries"][:top]:
+            lines.append(f"{q['at']}  {q['ms']:.1f} ms  {q['rows']} rows  {q['sql'][:160]}")
+            lines.extend(f"    {step}" for step in q["plan"])
+        return "\n".join(lines)
+
+    def dump(self, filename):
+        """Write the profile to filename: Prometheus text for .prom/.txt, JSON otherwise"""
+        text = self.to_prometheus() if filename.endswith((".prom", ".txt")) else self.to_json()
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -0,0 +1,108 @@
+"""Inventory report rendering
+
+Reports are produced as a sequence of text chunks of a few thousand lines each.
+Rows are streamed from the database in batches, every item is formatted with a
+single template into a line list, and per-row values are computed in SQL, so
+building a report is linear in its size and a view can display it a chunk at a
+time. Report totals are added up from the rows as they stream, so they always
+match the rows printed even when others write to the database meanwhile.
+"""
+from inventory_export import iter_batches
+
+CHUNK_LINES = 2000 # Lines per yielded chunk
+
+LOW_STOCK_QUERY = """
+    SELECT i.name, COALESCE(c.name, 'N/A') AS category_name, i.quantity, i.min_stock
+    FROM items i LEFT JOIN categories c ON i.category_id = c.id
+    WHERE i.is_low_stock
+    ORDER BY i.quantity ASC
+"""
+INVENTORY_QUERY = """
+    SELECT i.name, COALESCE(c.name, 'N/A') AS category_name, COALESCE(i.quantity, 0) AS quantity,
+           COALESCE(i.price, 0) AS price, COALESCE(i.quantity, 0) * COALESCE(i.price, 0) AS value,
+           COALESCE(NULLIF(i.supplier, ''), 'N/A') AS supplier
+    FROM items i LEFT JOIN categories c ON i.category_id = c.id
+    ORDER BY i.name
+"""
+CATEGORY_QUERY = """
+    SELECT c.name, COUNT(i.id) as item_count, COALESCE(SUM(i.quantity * i.price), 0) as total_value
+    FROM categories c LEFT JOIN items i ON c.id = i.category_id
+    GROUP BY c.id, c.name
+    ORDER BY SUM(i.quantity * i.price) DESC
+"""
+
+SEPARATOR = "-" * 30
+LOW_STOCK_ENTRY = "Item: {}\nCategory: {}\nCurrent Stock: {}\nMinimum Stock: {}\n" + SEPARATOR
+INVENTORY_ENTRY = "Item: {}\nCategory: {}\nQuantity: {}\nPrice: ${:.2f}\nTotal Value: ${:.2f}\nSupplier: {}\n" + SEPARATOR
+CATEGORY_ENTRY = "Category: {}\nNumber of Items: {}\nTotal Value: ${:.2f}\n" + SEPARATOR
+
+
+def _title(title):
+    return f"{title}\n{'=' * 50}\n"
+
+
+def _chunked(header, entries, empty_message, footer=None):
+    """Yield header, entries and footer joined into chunks of about CHUNK_LINES lines
+
+    footer, if given, is called for its text once every entry has been consumed.
+    """
+    lines = [header]
+    count = 0
+    for entry in entries:
+        lines.append(entry)
+        count += 1
+        if len(lines) * 5 >= CHUNK_LINES: # Entries are five to seven lines long
+            yield "\n".join(lines)
+            lines = []
+    if not count:
+        lines.append(empty_message)
+    elif footer is not None:
+        lines.append(footer())
+    if lines:
+        yield "\n".join(lines)
+
+
+def iter_low_stock_report(db_manager, progress=None):
+    """Yield the low stock report as text chunks"""
+    total = db_manager.get_dashboard_stats()['low_stock_items'] if progress else 0
+    entries = (LOW_STOCK_ENTRY.format(*row)
+               for batch in iter_batches(db_manager, LOW_STOCK_QUERY, progress=progress, total=total)
+               for row in batch)
+    return _chunked(_title("LOW STOCK REPORT"), entries, "No items are currently low in stock.")
+
+
+def iter_inventory_report(db_manager, progress=None):
+    """Yield the full inventory report as text chunks, with the total value of the rows printed"""
+    total_value = 0.0
+
+    def entries():
+        nonlocal total_value
+        for batch in iter_batches(db_manager, INVENTORY_QUERY, progress=progress):
+            for row in batch:
+                total_value += row[4] # The value column
+                yield INVENTORY_ENTRY.format(*row)
+
+    return _chunked(_title("FULL INVENTORY REPORT"), entries(), "No items in inventory.",
+                    lambda: f"\nTOTAL INVENTORY VALUE: ${total_value:.2f}")
+
+
+def iter_category_report(db_manager, progress=None):
+    """Yield the category-wise report as text chunks"""
+    total = db_manager.get_dashboard_stats()['total_categories'] if progress else 0
+    entries = (CATEGORY_ENTRY.format(*row)
+               for batch in iter_batches(db_manager, CATEGORY_QUERY, progress=progress, total=total)
+               for row in batch)
+    return _chunked(_title("CATEGORY REPORT"), entries, "No categories found.")
+
+
+# Report name -> chunk generator
+REPORTS = {
+    "low-stock": iter_low_stock_report,
+    "inventory": iter_inventory_report,
+    "category": iter_category_report,
+}
+
+
+def render_report(name, db_manager, progress=None):
+    """Return a report as a list of text chunks"""
+    return list(REPORTS[name](db_manager, progress))
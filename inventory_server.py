@@ -0,0 +1,363 @@
+"""Local HTTP/JSON API over the inventory database, built on aiohttp
+
+Lets scanners, POS terminals and scripts read and update stock alongside the
+desktop app. Reads run on a pool of threads, each with its own pooled SQLite
+connection, so many requests are served concurrently under WAL; all writes go
+through one writer thread, so server writes never contend with each other.
+
+Endpoints (JSON unless noted):
+
+    GET    /stats                       dashboard counters and the ten lowest-stock items
+    GET    /items                       ?after_id=&limit=&category_id=&search=&offset=&low_stock=1
+    GET    /items/{id}
+    POST   /items                       {"name", "category_id", "quantity", "price", "min_stock", "supplier"}
+    PUT    /items/{id}                  same body as POST; leave out quantity to keep the stock as is
+    DELETE /items/{id}
+    POST   /items/{id}/adjust           {"delta", "reason"}: atomic relative stock change
+    GET    /items/{id}/movements        ?limit=&since=
+    POST   /stock/receive               {"lines": [{"item_id", "quantity"}], "reason"}: all or nothing
+    POST   /stock/ship                  same body as receive
+    GET    /low-stock                   ?after_id=&limit=
+    GET    /categories
+    POST   /categories                  {"name", "description"}
+    GET    /reports/{name}              low-stock, inventory or category, as text/plain
+    GET    /metrics                     query and request timings, Prometheus text (with --profile)
+    GET    /diagnostics                 the same as JSON, with slow queries and their plans (with --profile)
+
+Item lists are paged by keyset: pass the returned next_after_id back as after_id
+(null on the last page). Search results are ranked, so they page by offset and
+return next_offset instead.
+
+Usage: python inventory_server.py [--db inventory.db] [--host 127.0.0.1] [--port 8080] [--readers 8] [--profile]
+"""
+import argparse
+import asyncio
+import functools
+import json
+import math
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+import inventory_reports
+from inventory_db import DatabaseManager
+from inventory_profiling import Profiler
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+DEFAULT_READERS = 8
+
+
+class Database:
+    """Runs DatabaseManager calls off the event loop: reads on a thread pool, writes on a single thread"""
+
+    def __init__(self, db_name, readers=DEFAULT_READERS, profiler=None):
+        self.db_manager = DatabaseManager(db_name, profiler)
+        self._readers = ThreadPoolExecutor(readers, thread_name_prefix="db-reader")
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="db-writer")
+
+    async def read(self, func, *args, **kwargs):
+        """Await func(db_manager, *args, **kwargs) on a reader thread"""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._readers, functools.partial(func, self.db_manager, *args, **kwargs))
+
+    async def write(self, func, *args, **kwargs):
+        """Await func(db_manager, *args, **kwargs) on the writer thread"""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._writer, functools.partial(func, self.db_manager, *args, **kwargs))
+
+    def close(self):
+        self._readers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+        self.db_manager.close() # Closes every thread's connection
+
+
+def _json_response(data, status=200):
+    """web.json_response that never writes NaN or Infinity, which Python's json allows but clients cannot parse"""
+    try:
+        text = json.dumps(data, allow_nan=False)
+    except ValueError:
+        raise web.HTTPInternalServerError(text="The response holds a number that JSON cannot represent") from None
+    return web.json_response(text=text, status=status)
+
+
+def _row(row):
+    return dict(row) if row is not None else None
+
+
+def _int_param(request, name, default=None, minimum=0, maximum=None):
+    value = request.query.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer") from None
+    if number < minimum or (maximum is not None and number > maximum):
+        raise ValueError(f"{name} is out of range")
+    return number
+
+
+def _item_id(request):
+    try:
+        return int(request.match_info["item_id"])
+    except ValueError:
+        raise web.HTTPNotFound() from None
+
+
+async def _json_object(request):
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        raise ValueError("Request body must be JSON") from None
+    if not isinstance(body, dict):
+        raise ValueError("Request body must be a JSON object")
+    return body
+
+
+async def _item_payload(request, update=False):
+    """Validate an item body; returns the values in DatabaseManager.insert_item argument order
+
+    On update, a missing quantity is returned as None so the stock is left alone.
+    """
+    body = await _json_object(request)
+
+    name = body.get("name")
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("name is required")
+    category_id = body.get("category_id")
+    if category_id is not None and (not isinstance(category_id, int) or isinstance(category_id, bool)):
+        raise ValueError("category_id must be an integer or null")
+    values = [name.strip(), category_id]
+    for field, kind in (("quantity", int), ("price", (int, float)), ("min_stock", int)):
+        if field == "quantity" and update and body.get(field) is None:
+            values.append(None)
+            continue
+        value = body.get(field, 0)
+        if not isinstance(value, kind) or isinstance(value, bool) or value < 0:
+            raise ValueError(f"{field} must be a number of at least 0")
+        if isinstance(value, float) and not math.isfinite(value): # The JSON parser accepts NaN, Infinity and 1e400
+            raise ValueError(f"{field} must be a finite number")
+        values.append(value)
+    supplier = body.get("supplier") or ""
+    if not isinstance(supplier, str):
+        raise ValueError("supplier must be a string")
+    values.append(supplier.strip())
+    return values
+
+
+@web.middleware
+async def error_middleware(request, handler):
+    """Turn validation and constraint errors into JSON 400 / 409 responses"""
+    try:
+        return await handler(request)
+    except ValueError as e:
+        return _json_response({"error": str(e)}, status=400)
+    except sqlite3.IntegrityError as e:
+        return _json_response({"error": str(e)}, status=409)
+
+
+@web.middleware
+async def profile_middleware(request, handler):
+    """Time each request as an operation named after its route, when profiling is on"""
+    profiler = request.app["db"].db_manager.profiler
+    if profiler is None:
+        return await handler(request)
+    route = request.match_info.route.resource
+    with profiler.operation(f"{request.method} {route.canonical if route else request.path}"):
+        return await handler(request)
+
+
+def _profiler(request):
+    profiler = request.app["db"].db_manager.profiler
+    if profiler is None:
+        raise web.HTTPNotFound(text="Profiling is off; start the server with --profile")
+    return profiler
+
+
+async def get_metrics(request):
+    return web.Response(text=_profiler(request).to_prometheus(), content_type="text/plain", charset="utf-8",
+                        headers={"X-Content-Type-Options": "nosniff"})
+
+
+async def get_diagnostics(request):
+    return _json_response(_profiler(request).snapshot())
+
+
+async def get_stats(request):
+    return _json_response(await request.app["db"].read(DatabaseManager.get_dashboard_stats))
+
+
+async def list_items(request, low_stock=False):
+    limit = _int_param(request, "limit", DEFAULT_PAGE_SIZE, minimum=1, maximum=MAX_PAGE_SIZE)
+    search = request.query.get("search", "").strip()
+    low_stock = low_stock or request.query.get("low_stock") in ("1", "true")
+    offset = _int_param(request, "offset", 0)
+    rows = await request.app["db"].read(
+        DatabaseManager.fetch_items, search=search, category_id=_int_param(request, "category_id"),
+        after_id=_int_param(request, "after_id", 0), offset=offset, limit=limit + 1, low_stock=low_stock)
+
+    # One row past the page tells whether there is a next page without a COUNT
+    has_more = len(rows) > limit
+    items = [_row(row) for row in rows[:limit]]
+    result = {"items": items}
+    if search and DatabaseManager.build_search_query(search):
+        result["next_offset"] = offset + limit if has_more else None
+    else:
+        result["next_after_id"] = items[-1]["id"] if has_more else None
+    return _json_response(result)
+
+
+async def list_low_stock(request):
+    return await list_items(request, low_stock=True)
+
+
+async def get_item(request):
+    row = await request.app["db"].read(DatabaseManager.get_item, _item_id(request))
+    if row is None:
+        raise web.HTTPNotFound()
+    return _json_response(_row(row))
+
+
+async def create_item(request):
+    values = await _item_payload(request)
+    row = await request.app["db"].write(DatabaseManager.insert_item, *values)
+    return _json_response(_row(row), status=201)
+
+
+async def update_item(request):
+    item_id = _item_id(request)
+    values = await _item_payload(request, update=True)
+    row = await request.app["db"].write(DatabaseManager.update_item, item_id, *values)
+    if row is None:
+        raise web.HTTPNotFound()
+    return _json_response(_row(row))
+
+
+async def delete_item(request):
+    row = await request.app["db"].write(DatabaseManager.delete_item, _item_id(request))
+    if row is None:
+        raise web.HTTPNotFound()
+    return web.Response(status=204)
+
+
+async def adjust_stock(request):
+    item_id = _item_id(request)
+    body = await _json_object(request)
+    quantity = await request.app["db"].write(DatabaseManager.adjust_stock, item_id, body.get("delta"),
+                                             str(body.get("reason") or ""))
+    return _json_response({"item_id": item_id, "quantity": quantity})
+
+
+async def move_stock(request, operation):
+    body = await _json_object(request)
+    lines = body.get("lines")
+    if not isinstance(lines, list) or not lines or not all(isinstance(line, dict) for line in lines):
+        raise ValueError("lines must be a non-empty list of {item_id, quantity} objects")
+    lines = [(line.get("item_id"), line.get("quantity")) for line in lines]
+    kwargs = {"reason": str(body["reason"])} if body.get("reason") else {}
+    quantities = await request.app["db"].write(operation, lines, **kwargs)
+    return _json_response({"quantities": [{"item_id": item_id, "quantity": quantity}
+                                             for item_id, quantity in quantities.items()]})
+
+
+async def receive_stock(request):
+    return await move_stock(request, DatabaseManager.receive_stock)
+
+
+async def ship_stock(request):
+    return await move_stock(request, DatabaseManager.ship_stock)
+
+
+async def list_movements(request):
+    rows = await request.app["db"].read(
+        DatabaseManager.get_stock_movements, _item_id(request), since=request.query.get("since"),
+        limit=_int_param(request, "limit", DEFAULT_PAGE_SIZE, minimum=1, maximum=MAX_PAGE_SIZE))
+    return _json_response({"movements": [_row(row) for row in rows]})
+
+
+def _fetch_categories(db_manager):
+    return db_manager.execute_query("SELECT id, name, description FROM categories ORDER BY name ASC", fetch=True)
+
+
+def _insert_category(db_manager, name, description):
+    return {"id": db_manager.add_category(name, description), "name": name, "description": description}
+
+
+async def list_categories(request):
+    rows = await request.app["db"].read(_fetch_categories)
+    return _json_response({"categories": [_row(row) for row in rows]})
+
+
+async def create_category(request):
+    body = await _json_object(request)
+    name = body.get("name")
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("name is required")
+    description = str(body.get("description") or "").strip()
+    category = await request.app["db"].write(_insert_category, name.strip(), description)
+    return _json_response(category, status=201)
+
+
+def _render_report(db_manager, name):
+    return inventory_reports.render_report(name, db_manager)
+
+
+async def get_report(request):
+    name = request.match_info["name"]
+    if name not in inventory_reports.REPORTS:
+        raise web.HTTPNotFound()
+    chunks = await request.app["db"].read(_render_report, name)
+    response = web.StreamResponse(headers={"Content-Type": "text/plain; charset=utf-8"})
+    await response.prepare(request)
+    for chunk in chunks:
+        await response.write(chunk.encode("utf-8") + b"\n")
+    await response.write_eof()
+    return response
+
+
+async def close_database(app):
+    await asyncio.get_running_loop().run_in_executor(None, app["db"].close)
+
+
+def create_app(db_name="inventory.db", readers=DEFAULT_READERS, profiler=None):
+    """Build the aiohttp application; the database pools are closed on app cleanup"""
+    app = web.Application(middlewares=[profile_middleware, error_middleware])
+    app["db"] = Database(db_name, readers, profiler)
+    app.on_cleanup.append(close_database)
+    app.add_routes([
+        web.get("/stats", get_stats),
+        web.get("/items", list_items),
+        web.post("/items", create_item),
+        web.get("/items/{item_id}", get_item),
+        web.put("/items/{item_id}", update_item),
+        web.delete("/items/{item_id}", delete_item),
+        web.post("/items/{item_id}/adjust", adjust_stock),
+        web.get("/items/{item_id}/movements", list_movements),
+        web.post("/stock/receive", receive_stock),
+        web.post("/stock/ship", ship_stock),
+        web.get("/low-stock", list_low_stock),
+        web.get("/categories", list_categories),
+        web.post("/categories", create_category),
+        web.get("/reports/{name}", get_report),
+        web.get("/metrics", get_metrics),
+        web.get("/diagnostics", get_diagnostics),
+    ])
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inventory HTTP/JSON API")
+    parser.add_argument("--db", default="inventory.db", help="database file (default: inventory.db)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--readers", type=int, default=DEFAULT_READERS, help="reader threads / connections")
+    parser.add_argument("--profile", action="store_true", help="time queries and requests, served on /metrics")
+    args = parser.parse_args(argv)
+    profiler = Profiler() if args.profile else None
+    web.run_app(create_app(args.db, args.readers, profiler), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()